@@ -0,0 +1,83 @@
+from __future__ import absolute_import, division, unicode_literals
+
+import random
+from bisect import bisect
+
+from .models import MAX_FIELDS, Author, Document
+
+SYLLABLES = [
+    consonant + vowel
+    for consonant in 'bcdfghjklmnprstvz'
+    for vowel in ('a', 'e', 'i', 'o', 'u', 'ai', 'ou')]
+DEFAULT_VOCABULARY_SIZE = 20000
+TITLE_WORDS = 6
+FIELD_WORDS = 80
+DOCUMENTS_PER_AUTHOR = 50
+CATEGORIES = 20
+BATCH_SIZE = 1000
+
+
+class Corpus(object):
+    """
+    Generates reproducible synthetic documents from a vocabulary
+    of made-up words, whose frequencies follow Zipf's law
+    like in natural languages.
+    """
+
+    def __init__(self, seed=0, vocabulary_size=DEFAULT_VOCABULARY_SIZE):
+        self.random = random.Random(seed)
+        words = set()
+        while len(words) < vocabulary_size:
+            words.add(''.join(self.random.choice(SYLLABLES)
+                              for _ in range(self.random.randint(2, 4))))
+        # Sorted before shuffling so that the vocabulary
+        # does not depend on the iteration order of sets.
+        self.vocabulary = sorted(words)
+        self.random.shuffle(self.vocabulary)
+        self.cumulative_weights = []
+        total = 0
+        for rank in range(1, vocabulary_size + 1):
+            total += 1 / rank
+            self.cumulative_weights.append(total)
+
+    def get_word(self):
+        return self.vocabulary[bisect(
+            self.cumulative_weights,
+            self.random.random() * self.cumulative_weights[-1])]
+
+    def get_text(self, words):
+        return ' '.join(self.get_word() for _ in range(words))
+
+    def get_queries(self, count, max_words=2):
+        """
+        Returns queries of frequent, common and rare words,
+        in the same proportions as they appear in documents.
+        """
+        return [self.get_text(self.random.randint(1, max_words))
+                for _ in range(count)]
+
+    def get_prefixes(self, count):
+        return [self.get_word()[:3] for _ in range(count)]
+
+    def create_documents(self, count, fields=MAX_FIELDS + 1, related=True):
+        """
+        Creates ``count`` documents with ``fields`` text fields including
+        their title, and authors if ``related`` is ``True``.
+        """
+        authors = []
+        if related:
+            authors = Author.objects.bulk_create([
+                Author(name=self.get_text(2), biography=self.get_text(30))
+                for _ in range(count // DOCUMENTS_PER_AUTHOR + 1)])
+        for start in range(0, count, BATCH_SIZE):
+            documents = []
+            for _ in range(min(BATCH_SIZE, count - start)):
+                document = Document(
+                    title=self.get_text(TITLE_WORDS),
+                    author=self.random.choice(authors) if authors else None,
+                    category=self.random.randrange(CATEGORIES))
+                for i in range(1, fields):
+                    setattr(document, 'field_%d' % i,
+                            self.get_text(FIELD_WORDS))
+                documents.append(document)
+            Document.objects.bulk_create(documents)
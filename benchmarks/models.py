@@ -0,0 +1,63 @@
+from __future__ import absolute_import, unicode_literals
+
+from django.db import models
+from django.utils.encoding import python_2_unicode_compatible
+from wagtail.wagtailsearch import index
+
+# Number of text fields of documents besides their title.
+MAX_FIELDS = 8
+DEFAULT_BOOSTS = (10, 2)
+
+
+def get_search_fields(fields=3, boosts=DEFAULT_BOOSTS, related=True):
+    """
+    Returns the search fields of documents indexing their title and
+    ``fields - 1`` other text fields, boosted by ``boosts`` in that order,
+    and optionally the fields of their author.
+    """
+    if not 1 <= fields <= MAX_FIELDS + 1:
+        raise ValueError('Documents have between 1 and %d fields.'
+                         % (MAX_FIELDS + 1))
+    field_names = ['title'] + ['field_%d' % i for i in range(1, fields)]
+    search_fields = [
+        index.SearchField(field_name,
+                          boost=boosts[i] if i < len(boosts) else None,
+                          partial_match=field_name == 'title')
+        for i, field_name in enumerate(field_names)]
+    if related:
+        search_fields.append(index.RelatedFields('author', [
+            index.SearchField('name', partial_match=True),
+            index.SearchField('biography'),
+        ]))
+    search_fields.append(index.FilterField('category'))
+    return search_fields
+
+
+@python_2_unicode_compatible
+class Author(models.Model):
+    name = models.CharField(max_length=255)
+    biography = models.TextField(blank=True)
+
+    def __str__(self):
+        return self.name
+
+
+@python_2_unicode_compatible
+class Document(index.Indexed, models.Model):
+    title = models.CharField(max_length=255)
+    field_1 = models.TextField(blank=True)
+    field_2 = models.TextField(blank=True)
+    field_3 = models.TextField(blank=True)
+    field_4 = models.TextField(blank=True)
+    field_5 = models.TextField(blank=True)
+    field_6 = models.TextField(blank=True)
+    field_7 = models.TextField(blank=True)
+    field_8 = models.TextField(blank=True)
+    author = models.ForeignKey(Author, null=True, on_delete=models.CASCADE,
+                               related_name='documents')
+    category = models.PositiveSmallIntegerField(db_index=True)
+
+    search_fields = get_search_fields()
+
+    def __str__(self):
+        return self.title
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+Benchmarks indexing and search throughput on a synthetic corpus,
+in a PostgreSQL database created for the run. For example::
+
+    python -m benchmarks.run --documents 100000 --output results.json
+"""
+from __future__ import absolute_import, print_function, unicode_literals
+
+import argparse
+import json
+import os
+import sys
+from collections import OrderedDict
+
+import django
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--documents', type=int, default=10000,
+                        help='Number of generated documents.')
+    parser.add_argument('--fields', type=int, default=3,
+                        help='Number of indexed text fields of documents, '
+                             'including their title (1 to 9).')
+    parser.add_argument('--boosts', default='10,2',
+                        help='Comma-separated boosts of the fields, '
+                             'in order. Other fields are not boosted.')
+    parser.add_argument('--no-related', dest='related', action='store_false',
+                        help='Do not index the authors of documents '
+                             'using RelatedFields.')
+    parser.add_argument('--queries', type=int, default=500,
+                        help='Number of runs of each search.')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Also benchmarks a parallel rebuild '
+                             'with this number of processes.')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed of the generated corpus and queries.')
+    parser.add_argument('--vocabulary', type=int, default=20000,
+                        help='Number of distinct words of the corpus.')
+    parser.add_argument('--backend', default='default',
+                        help='Name of the benchmarked search backend.')
+    parser.add_argument('--output',
+                        help='Writes the results to this JSON file '
+                             'instead of the standard output.')
+    return parser
+
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    django.setup()
+
+    from django.db import connection
+
+    from .corpus import Corpus
+    from .suite import run
+
+    config = OrderedDict([
+        ('documents', args.documents),
+        ('fields', args.fields),
+        ('boosts', [float(boost) for boost in args.boosts.split(',')
+                    if boost]),
+        ('related', args.related),
+        ('queries', args.queries),
+        ('workers', args.workers),
+        ('seed', args.seed),
+        ('vocabulary', args.vocabulary),
+        ('backend', args.backend),
+    ])
+    results = OrderedDict([('config', config)])
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        results.update(run(args.backend, Corpus(args.seed, args.vocabulary),
+                           args.documents, args.fields, config['boosts'],
+                           args.related, args.queries, args.workers))
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+    output = json.dumps(results, indent=2)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,45 @@
+import os
+
+SECRET_KEY = 'this is required'
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('BENCHMARK_DATABASE',
+                               'wagtail_pgsearchbackend'),
+        'USER': os.environ.get('BENCHMARK_USER', 'postgres'),
+        'HOST': os.environ.get('BENCHMARK_HOST', ''),
+        'TEST': {
+            # Benchmarks run in a database created for the run,
+            # distinct from the one of the unit tests.
+            'NAME': 'benchmark_wagtail_pgsearchbackend',
+        },
+    }
+}
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+
+    'modelcluster',
+    'taggit',
+
+    'wagtail.wagtailcore',
+    'wagtail.wagtailsearch',
+
+    'wagtail_pgsearchbackend',
+    'benchmarks',
+]
+
+WAGTAILSEARCH_BACKENDS = {
+    'default': {
+        'BACKEND': 'wagtail_pgsearchbackend.backend',
+        'SEARCH_CONFIG': 'english',
+    }
+}
+
+# Unlike unit tests, migrations run so that the index has its GIN indexes.
+# Benchmark models have no migrations, their tables are created directly.
+MIGRATION_MODULES = {
+    'benchmarks': None,
+}
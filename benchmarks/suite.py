@@ -0,0 +1,180 @@
+from __future__ import absolute_import, division, unicode_literals
+
+import platform
+import subprocess
+from collections import OrderedDict
+from timeit import default_timer
+
+import django
+from django.db import DEFAULT_DB_ALIAS, connections
+from wagtail.wagtailsearch.backends import get_search_backend
+
+from wagtail_pgsearchbackend.parallel import ParallelRebuilder
+from wagtail_pgsearchbackend.plan import clear_indexing_plans
+from wagtail_pgsearchbackend.utils import (
+    BOOSTS_WEIGHTS, WEIGHTS_VALUES, determine_boosts_weights)
+
+from .models import Document, get_search_fields
+
+# Backend params of each benchmarked rebuild.
+REBUILDS = OrderedDict([
+    ('default', {}),
+    ('atomic', {'ATOMIC_REBUILD': True}),
+    ('copy', {'COPY_REBUILD': True}),
+    ('shadow', {'SHADOW_REBUILD': True}),
+])
+PAGE_SIZE = 10
+
+
+def set_search_fields(search_fields):
+    """
+    Replaces the search fields of documents, and maps their boosts
+    to weights like when apps are ready.
+    """
+    Document.search_fields = search_fields
+    clear_indexing_plans()
+    del BOOSTS_WEIGHTS[:]
+    del WEIGHTS_VALUES[:]
+    BOOSTS_WEIGHTS.extend(determine_boosts_weights())
+    max_weight = BOOSTS_WEIGHTS[0][0]
+    WEIGHTS_VALUES.extend([v / max_weight
+                           for v, w in reversed(BOOSTS_WEIGHTS)])
+
+
+def timed(function, *args, **kwargs):
+    start = default_timer()
+    function(*args, **kwargs)
+    return default_timer() - start
+
+
+def get_percentiles(durations):
+    """
+    Returns the mean and nearest-rank percentiles
+    of durations in milliseconds.
+    """
+    durations = sorted(durations)
+    stats = OrderedDict([('mean', sum(durations) / len(durations) * 1000)])
+    for percentile in (50, 95, 99):
+        rank = max(int(round(percentile / 100 * len(durations))) - 1, 0)
+        stats['p%d' % percentile] = durations[rank] * 1000
+    return stats
+
+
+def get_environment(db_alias=DEFAULT_DB_ALIAS):
+    try:
+        commit = subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'],
+            stderr=subprocess.STDOUT).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return OrderedDict([
+        ('commit', commit),
+        ('python', platform.python_version()),
+        ('django', django.get_version()),
+        ('postgresql', connections[db_alias].pg_version),
+    ])
+
+
+def benchmark_indexing(backend):
+    """
+    Indexes all documents in an empty index,
+    then again while they did not change.
+    """
+    documents = Document.get_indexed_objects()
+    count = documents.count()
+    results = OrderedDict()
+    backend.reset_index()
+    for name in ('empty_index', 'unchanged'):
+        index = backend.get_index_for_model(Document)
+        duration = timed(index.add_items, Document, documents.iterator())
+        results[name] = OrderedDict([
+            ('seconds', duration),
+            ('docs_per_second', count / duration),
+            ('written', index.written_count),
+            ('skipped', index.skipped_count),
+        ])
+    return results
+
+
+def rebuild(backend):
+    index = backend.get_index_for_model(Document)
+    rebuilder = backend.rebuilder_class(index)
+    index = rebuilder.start()
+    index.add_model(Document)
+    index.add_items(Document, Document.get_indexed_objects().iterator())
+    rebuilder.finish()
+
+
+def benchmark_rebuilds(backend_name, workers=1):
+    results = OrderedDict()
+    for name, params in REBUILDS.items():
+        backend = get_search_backend(backend_name, **params)
+        backend.reset_index()
+        results[name] = timed(rebuild, backend)
+    if workers > 1:
+        get_search_backend(backend_name).reset_index()
+        results['parallel'] = timed(ParallelRebuilder(
+            backend_name, DEFAULT_DB_ALIAS, workers, workers * 4,
+            [Document]).run)
+    return results
+
+
+def get_searches(backend_name):
+    """
+    Returns the benchmarked searches as functions of a query string.
+    """
+    backend = get_search_backend(backend_name)
+    two_phase_backend = get_search_backend(backend_name,
+                                           TWO_PHASE_SEARCH=True)
+    return OrderedDict([
+        ('search', lambda query: list(
+            backend.search(query, Document)[:PAGE_SIZE])),
+        ('search_fields', lambda query: list(
+            backend.search(query, Document, fields=['title'])[:PAGE_SIZE])),
+        ('search_filtered', lambda query: list(
+            backend.search(query, Document.objects.filter(category=0))
+            [:PAGE_SIZE])),
+        ('search_two_phase', lambda query: list(
+            two_phase_backend.search(query, Document)[:PAGE_SIZE])),
+        ('count', lambda query: backend.search(query, Document).count()),
+        ('autocomplete', lambda prefix: list(
+            backend.autocomplete(prefix, Document)[:PAGE_SIZE])),
+    ])
+
+
+def benchmark_searches(backend_name, queries, prefixes):
+    """
+    Returns latency percentiles of each search, autocomplete
+    using ``prefixes`` and the others using ``queries``.
+    """
+    results = OrderedDict()
+    for name, search in get_searches(backend_name).items():
+        search_queries = prefixes if name == 'autocomplete' else queries
+        # Warms up the database cache.
+        for query in search_queries[:len(search_queries) // 10]:
+            search(query)
+        results[name] = get_percentiles([timed(search, query)
+                                         for query in search_queries])
+    return results
+
+
+def run(backend_name, corpus, documents, fields, boosts, related, queries,
+        workers=1):
+    """
+    Creates the documents using ``corpus``, then runs all the benchmarks
+    and returns their results.
+    """
+    set_search_fields(get_search_fields(fields, boosts, related))
+    corpus.create_documents(documents, fields, related)
+    results = OrderedDict([
+        ('environment', get_environment()),
+        ('indexing', benchmark_indexing(get_search_backend(backend_name))),
+        ('rebuilds', benchmark_rebuilds(backend_name, workers)),
+    ])
+    # Updates the statistics used by the query planner.
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute('ANALYZE;')
+    results['searches'] = benchmark_searches(
+        backend_name, corpus.get_queries(queries),
+        corpus.get_prefixes(queries))
+    return results
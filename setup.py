@@ -17,7 +17,7 @@ setup(
     version=__version__,
     author='Bertrand Bordage',
     author_email='bordage.bertrand@gmail.com',
-    packages=find_packages(exclude=['tests']),
+    packages=find_packages(exclude=['tests', 'benchmarks']),
     include_package_data=True,
     zip_safe=False,
     url='https://github.com/leukeleu/wagtail-pg-search-backend',
@@ -1,12 +1,30 @@
 # coding: utf-8
 from __future__ import unicode_literals
 
+from contextlib import contextmanager
+
+from django.contrib.contenttypes.models import ContentType
 from django.core.management import call_command
+from django.db import connection, transaction
 from django.test import TestCase
 from django.utils.six import StringIO
-from wagtail.tests.search.models import SearchTest
+from wagtail.tests.search.models import AnotherSearchTestChild, SearchTest
+from wagtail.wagtailsearch.backends import get_search_backend
+from wagtail.wagtailsearch.backends.base import FieldError
 from wagtail.wagtailsearch.tests.test_backends import BackendTests
 
+from wagtail_pgsearchbackend.backend import (
+    PostgresSearchAtomicRebuilder, PostgresSearchShadowRebuilder,
+    deferred_deletes)
+from wagtail_pgsearchbackend.indexes import create_indexes
+from wagtail_pgsearchbackend.models import (
+    IndexEntry, IndexQueueEntry, Lexeme)
+from wagtail_pgsearchbackend.plan import (
+    clear_indexing_plans, get_indexing_plan)
+from wagtail_pgsearchbackend.query import (
+    RANK_FUNCTIONS, LexemeSearchQuery, compile_search_query)
+from wagtail_pgsearchbackend.suggestions import refresh_lexicon
+from wagtail_pgsearchbackend.update_queue import process_queue
 from wagtail_pgsearchbackend.utils import (
     BOOSTS_WEIGHTS, WEIGHTS_VALUES, determine_boosts_weights, get_weight)
 
@@ -14,6 +32,18 @@ from wagtail_pgsearchbackend.utils import (
 class TestPgSearchBackend(BackendTests, TestCase):
     backend_path = 'wagtail_pgsearchbackend.backend'
 
+    @contextmanager
+    def title_boost(self, boost):
+        title_search_field = SearchTest.search_fields[0]
+        original_title_boost = title_search_field.boost
+        title_search_field.boost = boost
+        clear_indexing_plans()
+        try:
+            yield
+        finally:
+            title_search_field.boost = original_title_boost
+            clear_indexing_plans()
+
     def test_update_index_command(self):
         self.backend.reset_index()
 
@@ -73,26 +103,486 @@ class TestPgSearchBackend(BackendTests, TestCase):
                              [(4, 'A'), (2, 'B'), (0, 'C'), (-2, 'D')])
 
     def test_ranking(self):
+        SearchTest.objects.all().delete()
+
+        with self.title_boost(2):
+            vivaldi_composer = SearchTest.objects.create(
+                title='Antonio Vivaldi',
+                content='Born in 1678, Vivaldi is one of Earth’s '
+                        'most inspired composers. '
+                        'Read more about it in your favorite browser.')
+            vivaldi_browser = SearchTest.objects.create(
+                title='The Vivaldi browser',
+                content='This web browser is based on WebKit.')
+
+            results = self.backend.search('vivaldi', SearchTest)
+            self.assertListEqual(list(results),
+                                 [vivaldi_composer, vivaldi_browser])
+            results = self.backend.search('browser', SearchTest)
+            self.assertListEqual(list(results),
+                                 [vivaldi_browser, vivaldi_composer])
+
+    def test_object_boost(self):
+        # Fields without boosts do not contribute to the rank,
+        # yet boosts still order the results.
+        boosted_pk = self.testb.pk
+        SearchTest.get_search_boost = (
+            lambda obj: 100 if obj.pk == boosted_pk else 1)
+        try:
+            self.backend.add_bulk(SearchTest, list(SearchTest.objects.all()))
+        finally:
+            del SearchTest.get_search_boost
+        self.assertEqual(IndexEntry.objects.for_object(self.testb).get()
+                         .boost, 100)
+
+        results = self.backend.search('hello', SearchTest)
+        self.assertEqual(results[0], self.testb)
+
+    def test_rank_normalization(self):
+        SearchTest.objects.all().delete()
+        with self.title_boost(2):
+            short_doc = SearchTest.objects.create(title='Vivaldi')
+            long_doc = SearchTest.objects.create(
+                title='Vivaldi',
+                content='Born in 1678, Vivaldi is one of Earth’s '
+                        'most inspired composers.')
+        if connection.pg_version >= 90600:  # PostgreSQL >= 9.6
+            self.assertGreater(IndexEntry.objects.for_object(long_doc).get()
+                               .body_length, 5)
+
+        # Shorter documents rank first when normalizing by length.
+        self.backend.params = dict(self.backend.params,
+                                   RANK_FUNCTION='ts_rank_cd',
+                                   RANK_NORMALIZATION=2 | 32)
+        results = self.backend.search('vivaldi', SearchTest)
+        self.assertListEqual(list(results), [short_doc, long_doc])
+        # Entries without a precomputed length are normalized as well.
+        IndexEntry.objects.update(body_length=None)
+        results = self.backend.search('vivaldi', SearchTest)
+        self.assertListEqual(list(results), [short_doc, long_doc])
+
+    def test_length_normalization(self):
+        if connection.pg_version < 90600:  # PostgreSQL < 9.6
+            self.skipTest('Word counts are stored on PostgreSQL >= 9.6.')
+        with self.title_boost(2):
+            SearchTest.objects.create(
+                title='Vivaldi',
+                content='Born in 1678, Vivaldi is one of Earth’s '
+                        'most inspired composers.')
+            self.backend.add_bulk(SearchTest, list(SearchTest.objects.all()))
+        search_query = compile_search_query('vivaldi hello', 'or', None)
+        entries = IndexEntry.objects.for_models(SearchTest)
+        normalizations = [(function, normalization)
+                          for function in RANK_FUNCTIONS
+                          for normalization in (1, 2, 1 | 2 | 32)]
+
+        def get_ranks():
+            return [dict(entries.add_rank(search_query, function=function,
+                                          normalization=normalization)
+                         .values_list('object_id', 'rank'))
+                    for function, normalization in normalizations]
+
+        precomputed_ranks = get_ranks()
+        # Without a stored word count, ranking functions normalize ranks.
+        entries.update(body_length=None)
+        for (function, normalization), ranks, expected_ranks in zip(
+                normalizations, precomputed_ranks, get_ranks()):
+            for object_id, rank in ranks.items():
+                self.assertAlmostEqual(
+                    rank, expected_ranks[object_id],
+                    msg='%s normalized by %d' % (function, normalization))
+
+    def test_indexing_plan(self):
+        plan = get_indexing_plan(SearchTest)
+        self.assertIs(get_indexing_plan(SearchTest), plan)
+        self.assertListEqual(plan.related_lookups, ['tags'])
+
+        index = self.backend.get_index_for_model(SearchTest)
+        self.assertIn(('Hello World', 'D'), index.prepare_body(self.testa))
+        self.assertIn(('Hello World', 'D'),
+                      index.prepare_autocomplete(self.testa))
+
+        # The plan is kept until plans are cleared.
         title_search_field = SearchTest.search_fields[0]
         original_title_boost = title_search_field.boost
-        title_search_field.boost = 2
+        title_search_field.boost = 10
+        try:
+            self.assertIs(get_indexing_plan(SearchTest), plan)
+        finally:
+            title_search_field.boost = original_title_boost
 
-        SearchTest.objects.all().delete()
+        # Then it is rebuilt with the modified search fields.
+        with self.title_boost(10):
+            self.assertIsNot(get_indexing_plan(SearchTest), plan)
+            index = self.backend.get_index_for_model(SearchTest)
+            self.assertIn(('Hello World', 'A'),
+                          index.prepare_body(self.testa))
 
-        vivaldi_composer = SearchTest.objects.create(
-            title='Antonio Vivaldi',
-            content='Born in 1678, Vivaldi is one of Earth’s '
-                    'most inspired composers. '
-                    'Read more about it in your favorite browser.')
-        vivaldi_browser = SearchTest.objects.create(
-            title='The Vivaldi browser',
-            content='This web browser is based on WebKit.')
+    def test_add_items_in_batches(self):
+        self.backend.reset_index()
+        self.backend.params = dict(self.backend.params, INDEX_BATCH_SIZE=1)
+        index = self.backend.get_index_for_model(SearchTest)
+        index.add_items(SearchTest, SearchTest.objects.iterator())
 
-        results = self.backend.search('vivaldi', SearchTest)
-        self.assertListEqual(list(results),
-                             [vivaldi_composer, vivaldi_browser])
-        results = self.backend.search('browser', SearchTest)
-        self.assertListEqual(list(results),
-                             [vivaldi_browser, vivaldi_composer])
+        results = self.backend.search('hello', SearchTest)
+        self.assertSetEqual(set(results), {self.testa, self.testb,
+                                           self.testc.searchtest_ptr})
+        results = self.backend.search('world', SearchTest)
+        self.assertSetEqual(set(results), {self.testa,
+                                           self.testd.searchtest_ptr})
+
+    def test_skip_unchanged_entries(self):
+        index = self.backend.get_index_for_model(SearchTest)
+        index.add_items(SearchTest, [self.testa, self.testb])
+        self.assertEqual(index.written_count, 0)
+        self.assertEqual(index.skipped_count, 2)
+
+        self.testb.title = 'Goodbye'
+        index.add_items(SearchTest, [self.testa, self.testb])
+        self.assertEqual(index.written_count, 1)
+        self.assertEqual(index.skipped_count, 3)
+        results = self.backend.search('goodbye', SearchTest)
+        self.assertListEqual(list(results), [self.testb])
+
+    def test_prefetch_related(self):
+        self.testa.tags.add('greeting')
+        self.testb.tags.add('greeting', 'salutation')
+        index = self.backend.get_index_for_model(SearchTest)
+        objs = list(index.prefetch_related(SearchTest.objects.all()))
+        # Tags were fetched along with the objects.
+        with self.assertNumQueries(0):
+            bodies = [index.prepare_body(obj) for obj in objs]
+        self.assertIn(('salutation', 'D'), bodies[objs.index(self.testb)])
+
+    def test_delete_stale_entries(self):
+        content_type = ContentType.objects.get_for_model(SearchTest)
+        for object_id in ('1000000', '1000001'):
+            IndexEntry.objects.create(content_type=content_type,
+                                      object_id=object_id, body_search='',
+                                      autocomplete='')
+        self.backend.params = dict(self.backend.params, DELETE_BATCH_SIZE=1)
+        index = self.backend.get_index_for_model(SearchTest)
+        self.assertEqual(index.delete_stale_entries(), 2)
+        self.assertEqual(index.delete_stale_entries(), 0)
+
+        results = self.backend.search('hello', SearchTest)
+        self.assertSetEqual(set(results), {self.testa, self.testb,
+                                           self.testc.searchtest_ptr})
+
+    def test_typed_object_id(self):
+        entries = IndexEntry.objects.for_models(SearchTest)
+        self.assertFalse(entries.filter(int_object_id=None).exists())
+        self.assertSetEqual(
+            set(entries.values_list('int_object_id', flat=True)),
+            set(SearchTest.objects.values_list('pk', flat=True)))
+
+        self.backend.params = dict(self.backend.params, TYPED_OBJECT_ID=True)
+        results = self.backend.search('hello', SearchTest)
+        self.assertSetEqual(set(results), {self.testa, self.testb,
+                                           self.testc.searchtest_ptr})
+        results = self.backend.search('hello', SearchTest, fields=['title'])
+        self.assertSetEqual(set(results), {self.testa, self.testb,
+                                           self.testc.searchtest_ptr})
+
+    def test_partial_indexes(self):
+        if connection.pg_version < 90500:  # PostgreSQL < 9.5
+            self.skipTest('Index creation is tested on PostgreSQL >= 9.5.')
+        params = dict(self.backend.params, GIN_FASTUPDATE=False)
+        # Indexes cannot be created concurrently in a transaction.
+        statements = create_indexes(params, models=[SearchTest],
+                                    concurrently=False)
+        self.assertIn('WITH (fastupdate = off)', statements[0])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM pg_indexes "
+                "WHERE tablename = %s AND indexdef LIKE %s;",
+                [IndexEntry._meta.db_table,
+                 '%USING gin%WHERE (content_type_id%'])
+            # One for each search vector.
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+        results = self.backend.search('hello', SearchTest)
+        self.assertSetEqual(set(results), {self.testa, self.testb,
+                                           self.testc.searchtest_ptr})
+
+    def test_suggest(self):
+        # Also creates the pg_trgm extension, as migrations are disabled.
+        refresh_lexicon()
+        self.assertTrue(Lexeme.objects.filter(word='hello').exists())
+        self.assertEqual(self.backend.suggest('helo wrld'), 'hello world')
+        self.assertEqual(self.backend.suggest('hello helo'), 'hello hello')
+        self.assertIsNone(self.backend.suggest('Hello World'))
+        self.assertIsNone(self.backend.suggest('xyzzy'))
+
+    def test_facet(self):
+        results = self.backend.search('hello', SearchTest)
+        self.assertDictEqual(results.facet('live'), {True: 2, False: 1})
+        self.assertListEqual(list(results.facet('live')), [True, False])
+        results = self.backend.search('hello', SearchTest, fields=['title'])
+        self.assertDictEqual(results.facet('live'), {True: 2, False: 1})
+        with self.assertRaises(FieldError):
+            results.facet('content')
+
+    def test_delete_bulk(self):
+        self.backend.params = dict(self.backend.params, DELETE_BATCH_SIZE=1)
+        self.backend.delete_bulk(SearchTest, [self.testa, self.testb.pk])
+        results = self.backend.search('hello', SearchTest)
+        self.assertSetEqual(set(results), {self.testc.searchtest_ptr})
+
+    def test_deferred_deletes(self):
+        # Objects no longer have a primary key once deleted.
+        entries = IndexEntry.objects.for_models(SearchTest).filter(
+            object_id__in=['%s' % self.testa.pk, '%s' % self.testb.pk])
+        with deferred_deletes():
+            self.testa.delete()
+            self.testb.delete()
+            # Entries are removed at the end of the block.
+            self.assertEqual(entries.count(), 2)
+        self.assertFalse(entries.exists())
+
+    def test_copy_rebuild(self):
+        self.backend.reset_index()
+        self.backend.params = dict(self.backend.params, COPY_REBUILD=True)
+        rebuilder = self.backend.rebuilder_class(
+            self.backend.get_index_for_model(SearchTest))
+        index = rebuilder.start()
+        index.add_items(SearchTest, SearchTest.objects.all())
+        rebuilder.finish()
+
+        results = self.backend.search('hello', SearchTest)
+        self.assertSetEqual(set(results), {self.testa, self.testb,
+                                           self.testc.searchtest_ptr})
+        results = self.backend.search('world', SearchTest)
+        self.assertSetEqual(set(results), {self.testa,
+                                           self.testd.searchtest_ptr})
+
+    def test_parallel_rebuild_command(self):
+        self.backend.reset_index()
+        # A single process is used, since other processes would not see
+        # the objects created in the transaction of this test.
+        stdout = StringIO()
+        call_command('rebuild_pgsearch_index', backend_name=self.backend_name,
+                     workers=1, partitions=2, stdout=stdout)
+        self.assertIn('searchtests.SearchTest: 4/4 objects', stdout.getvalue())
+
+        results = self.backend.search('hello', SearchTest)
+        self.assertSetEqual(set(results), {self.testa, self.testb,
+                                           self.testc.searchtest_ptr})
+        results = self.backend.search('world', SearchTest)
+        self.assertSetEqual(set(results), {self.testa,
+                                           self.testd.searchtest_ptr})
+
+    def test_queued_updates(self):
+        self.backend.reset_index()
+        self.backend.params = dict(self.backend.params, QUEUED=True)
+        self.backend.add(self.testa)
+        self.backend.add(self.testa)
+        self.backend.add_bulk(SearchTest, [self.testa, self.testb])
+        # Repeated updates of an object are only queued once.
+        self.assertEqual(IndexQueueEntry.objects.count(), 2)
+        results = self.backend.search('hello', SearchTest)
+        self.assertSetEqual(set(results), set())
+
+        self.assertEqual(process_queue(self.backend), 2)
+        self.assertFalse(IndexQueueEntry.objects.exists())
+        results = self.backend.search('hello', SearchTest)
+        self.assertSetEqual(set(results), {self.testa, self.testb})
+
+        self.backend.add(self.testb)
+        self.backend.delete(self.testb)
+        self.assertEqual(process_queue(self.backend), 1)
+        results = self.backend.search('hello', SearchTest)
+        self.assertSetEqual(set(results), {self.testa})
+
+        # Objects can be removed by primary key.
+        self.backend.delete_bulk(SearchTest, [self.testa.pk])
+        self.assertEqual(process_queue(self.backend), 1)
+        results = self.backend.search('hello', SearchTest)
+        self.assertSetEqual(set(results), set())
+
+    def test_atomic_rebuild_failure(self):
+        self.backend.params = dict(self.backend.params, COPY_REBUILD=True)
+        savepoint_ids = list(connection.savepoint_ids)
+        rebuilder = PostgresSearchAtomicRebuilder(
+            self.backend.get_index_for_model(SearchTest))
+        index = rebuilder.start()
+        self.testa.title = 'Goodbye'
+        index.add_items(SearchTest, [self.testa])
+        # Like when update_index fails before finishing the rebuild.
+        del rebuilder
+        self.assertListEqual(connection.savepoint_ids, savepoint_ids)
+
+        # The rebuild is rolled back.
+        results = self.backend.search('goodbye', SearchTest)
+        self.assertSetEqual(set(results), set())
+        results = self.backend.search('hello', SearchTest)
+        self.assertSetEqual(set(results), {self.testa, self.testb,
+                                           self.testc.searchtest_ptr})
+
+    def test_shadow_rebuild(self):
+        if connection.pg_version < 90500:  # PostgreSQL < 9.5
+            self.skipTest('Shadow rebuilds require PostgreSQL >= 9.5.')
+        removed = SearchTest.objects.create(title='Hello')
+        self.backend.params = dict(self.backend.params, SHADOW_REBUILD=True)
+        rebuilder = PostgresSearchShadowRebuilder(
+            self.backend.get_index_for_model(SearchTest))
+        index = rebuilder.start()
+        # Searches still use the live table during the rebuild.
+        results = self.backend.search('hello', SearchTest)
+        self.assertSetEqual(set(results), {self.testa, self.testb,
+                                           self.testc.searchtest_ptr,
+                                           removed})
+        index.add_items(SearchTest, SearchTest.objects.filter(
+            pk__in=[self.testa.pk, self.testd.pk, removed.pk]))
+        # Writes made during the rebuild are kept. The savepoint gives
+        # them their own transaction id, like a separate transaction.
+        with transaction.atomic():
+            self.testa.title = 'Goodbye World'
+            self.testa.save()
+            self.backend.add(self.testa)
+            self.backend.delete(removed)
+        rebuilder.finish()
+
+        # Objects that were not rebuilt are removed,
+        # entries of other models are kept.
+        results = self.backend.search('hello', SearchTest)
+        self.assertSetEqual(set(results), {self.testc.searchtest_ptr})
+        results = self.backend.search('goodbye', SearchTest)
+        self.assertSetEqual(set(results), {self.testa})
+        results = self.backend.search('world', SearchTest)
+        self.assertSetEqual(set(results), {self.testa,
+                                           self.testd.searchtest_ptr})
+
+    def test_search_in_fields(self):
+        content_only = SearchTest.objects.create(title='Foo',
+                                                 content='Hello')
+        self.backend.add(content_only)
+
+        results = self.backend.search('hello', SearchTest, fields=['title'])
+        self.assertSetEqual(set(results), {self.testa, self.testb,
+                                           self.testc.searchtest_ptr})
+        results = self.backend.search('hello', SearchTest,
+                                      fields=['content'])
+        self.assertSetEqual(set(results), {self.testc.searchtest_ptr,
+                                           content_only})
+
+    def test_autocomplete(self):
+        results = self.backend.autocomplete('hel', SearchTest)
+        self.assertSetEqual(set(results), {self.testa, self.testb,
+                                           self.testc.searchtest_ptr})
+        results = self.backend.autocomplete('wor', SearchTest)
+        self.assertSetEqual(set(results), {self.testa,
+                                           self.testd.searchtest_ptr})
+        # Fields without partial match are not used for autocompletion.
+        results = self.backend.autocomplete('call', SearchTest)
+        self.assertSetEqual(set(results), set())
+
+    def test_two_phase_search(self):
+        self.backend.params = dict(self.backend.params, TWO_PHASE_SEARCH=True,
+                                   TWO_PHASE_OVERFETCH=1)
+        results = self.backend.search('hello', SearchTest)[:2]
+        self.assertEqual(len(results), 2)
+        # Too selective filters fall back to a regular search.
+        results = self.backend.search(
+            'hello', SearchTest.objects.filter(live=True))[:2]
+        self.assertSetEqual(set(results), {self.testb,
+                                           self.testc.searchtest_ptr})
+
+    def test_count_after_search(self):
+        results = self.backend.search('hello', SearchTest)
+        page = results[1:]
+        self.assertEqual(len(page), 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(results.count(), 3)
+            self.assertEqual(results[:2].count(), 2)
+        self.assertIsInstance(
+            self.backend.search('world', SearchTest).estimated_count(), int)
+
+    def test_compile_search_query(self):
+        compile_search_query.cache_clear()
+        search_query = compile_search_query('Hello "big world"', 'and', None)
+        self.assertIs(compile_search_query('Hello "big world"', 'and', None),
+                      search_query)
+        self.assertEqual(compile_search_query.cache_info().hits, 1)
+        # A single tsquery matches all the terms.
+        self.assertIsInstance(search_query, LexemeSearchQuery)
+
+        results = self.backend.search('hello world', SearchTest)
+        self.assertSetEqual(set(results), {self.testa})
+        results = self.backend.search('hello world', SearchTest,
+                                      operator='or')
+        self.assertSetEqual(set(results), {self.testa, self.testb,
+                                           self.testc.searchtest_ptr,
+                                           self.testd.searchtest_ptr})
+
+    def test_phrase_search(self):
+        if connection.pg_version < 90600:  # PostgreSQL < 9.6
+            self.skipTest('Phrase search requires PostgreSQL >= 9.6.')
+        test = SearchTest.objects.create(title='World Hello')
+        results = self.backend.search('"hello world"', SearchTest)
+        self.assertSetEqual(set(results), {self.testa})
+        results = self.backend.search('"world hello"', SearchTest)
+        self.assertSetEqual(set(results), {test})
+        results = self.backend.search('"world hello" hello', SearchTest)
+        self.assertSetEqual(set(results), {test})
+        results = self.backend.search('"hello world" "world hello"',
+                                      SearchTest, operator='or')
+        self.assertSetEqual(set(results), {self.testa, test})
+
+    def test_instrumentation(self):
+        events = []
+        self.backend = get_search_backend(
+            self.backend_name, INSTRUMENTATION=events.append,
+            SLOW_SEARCH_THRESHOLD=0)
+        self.assertEqual(len(self.backend.search('hello', SearchTest)[:2]), 2)
+        self.assertEqual(self.backend.search('hello', SearchTest).count(), 3)
+        self.backend.add_bulk(SearchTest, [self.testa, self.testb])
+
+        search, count, index = events
+        self.assertEqual(search['operation'], 'search')
+        self.assertEqual(search['model'], 'searchtests.SearchTest')
+        self.assertEqual(search['rows'], 2)
+        self.assertIn('body_search', search['sql'])
+        # Slow searches are not run again by default.
+        self.assertNotIn('Actual Total Time', search['plan'][0]['Plan'])
+        self.assertEqual(count['operation'], 'count')
+        self.assertEqual(count['rows'], 3)
+        self.assertIn('plan', count)
+        self.assertEqual(index['operation'], 'index')
+        self.assertEqual(index['batch_size'], 2)
+        self.assertEqual(index['skipped'], 2)
+        self.assertNotIn('plan', index)
+
+        del events[:]
+        self.backend = get_search_backend(
+            self.backend_name, INSTRUMENTATION=events.append,
+            SLOW_SEARCH_THRESHOLD=0, SLOW_SEARCH_ANALYZE_RATE=1)
+        self.assertEqual(self.backend.search('hello', SearchTest).count(), 3)
+        self.assertIn('Actual Total Time', events[0]['plan'][0]['Plan'])
+
+    def test_results_cache(self):
+        self.backend = get_search_backend(
+            self.backend_name, RESULTS_CACHE='default')
+        results = list(self.backend.search('hello', SearchTest))
+        with self.assertNumQueries(1):
+            self.assertListEqual(
+                list(self.backend.search('  HELLO ', SearchTest)), results)
+
+        # Indexing objects of another model keeps the cached results.
+        AnotherSearchTestChild.objects.create(title='Hello')
+        other_results = list(self.backend.search('hello',
+                                                 AnotherSearchTestChild))
+        self.assertEqual(len(other_results), 1)
+        self.testc.title = 'Hello Child'
+        self.testc.save()
+        self.backend.add(self.testc)
+        with self.assertNumQueries(1):
+            self.assertListEqual(
+                list(self.backend.search('hello', AnotherSearchTestChild)),
+                other_results)
 
-        title_search_field.boost = original_title_boost
+        # Indexing an object invalidates the cached results.
+        new_test = SearchTest.objects.create(title='Hello Again')
+        self.backend.add(new_test)
+        self.assertIn(new_test,
+                      list(self.backend.search('hello', SearchTest)))
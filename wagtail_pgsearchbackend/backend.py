@@ -2,26 +2,53 @@
 
 from __future__ import absolute_import, unicode_literals
 
-from django.contrib.postgres.search import (
-    SearchQuery, SearchRank, SearchVector)
+import hashlib
+import json
+import sys
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import islice
+from threading import local
+
+from django.contrib.postgres.search import SearchVector
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
 from django.db import (
     DEFAULT_DB_ALIAS, NotSupportedError, connections, transaction)
-from django.db.models import F, Manager, TextField, Value
+from django.db.models import Count, F, prefetch_related_objects
 from django.db.models.constants import LOOKUP_SEP
-from django.db.models.functions import Cast
+from django.db.models.expressions import RawSQL
 from django.utils.encoding import force_text, python_2_unicode_compatible
-from django.utils.six import string_types
+from django.utils.six import StringIO, string_types
 from wagtail.wagtailsearch.backends.base import (
-    BaseSearchBackend, BaseSearchQuery, BaseSearchResults)
-from wagtail.wagtailsearch.index import RelatedFields, SearchField
-
-from .models import IndexEntry
+    BaseSearchBackend, BaseSearchQuery, BaseSearchResults, FieldError)
+from wagtail.wagtailsearch.index import RelatedFields
+
+from .cache import ResultsCache
+from .instrumentation import Instrumentation, get_results_sql, measure
+from .models import (
+    TYPED_OBJECT_ID_COLUMNS, IndexEntry, IndexQueueEntry,
+    get_typed_object_id_column)
+from .plan import get_indexing_plan
+from .query import (
+    RANK_FUNCTIONS, NormalizedSearchRank, compile_search_query)
+from .suggestions import get_suggestion
+from .update_queue import enqueue
 from .utils import (
-    ADD, AND, OR, WEIGHTS_VALUES, get_content_types_pks,
-    get_postgresql_connections, get_weight, keyword_split, unidecode)
+    ADD, WEIGHTS, WEIGHTS_VALUES, copy_escape, get_content_types_pks,
+    get_db_alias_and_pk, get_descendants_content_types_pks,
+    get_postgresql_connections, get_weight)
 
 
-# TODO: Add autocomplete.
+# PostgreSQL cannot bind more parameters than this in a single statement.
+MAX_QUERY_PARAMS = 65535
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_BATCH_MAX_BYTES = 16 * 1024 * 1024
+DEFAULT_DELETE_BATCH_SIZE = 10000
+DEFAULT_AUTOCOMPLETE_CONFIG = 'simple'
+DEFAULT_AUTOCOMPLETE_MAX_LENGTH = 1000
+DEFAULT_TWO_PHASE_OVERFETCH = 3
+DEFAULT_RESULTS_CACHE_TIMEOUT = 300
+DEFAULT_RANK_FUNCTION = 'ts_rank'
 
 
 def get_db_alias(queryset):
@@ -49,7 +76,17 @@ class Index(object):
                 'to use PostgreSQL search.')
         self.db_alias = db_alias
         self.name = model._meta.label
-        self.search_fields = self.model.get_search_fields()
+        self.plan = get_indexing_plan(model)
+        self.typed_object_id_column = get_typed_object_id_column(model)
+        self.search_fields = self.plan.search_fields
+        # Table receiving the writes, replaced during shadow rebuilds.
+        self.db_table = IndexEntry._meta.db_table
+        # Set while a bulk load is in progress, see ``start_bulk_load``.
+        self.staging_table = None
+        # Number of entries written or skipped because they did not change
+        # by ``add_items``.
+        self.written_count = 0
+        self.skipped_count = 0
 
     def add_model(self, model):
         pass
@@ -57,88 +94,219 @@ class Index(object):
     def refresh(self):
         pass
 
+    def use_typed_object_id(self):
+        return self.backend.params.get('TYPED_OBJECT_ID', False)
+
+    def get_delete_batch_size(self):
+        return self.backend.params.get('DELETE_BATCH_SIZE',
+                                       DEFAULT_DELETE_BATCH_SIZE)
+
     def delete_stale_entries(self):
+        """
+        Deletes the entries of objects that no longer exist, in batches
+        committed separately when not in a transaction, so that rows
+        are never locked for long. Returns the number of deleted entries.
+        """
         if self.model._meta.parents:
             # We don’t need to delete stale entries for non-root models,
             # since we already delete them by deleting roots.
-            return
-        existing_pks = (self.model._default_manager.using(self.db_alias)
-                        .annotate(object_id=Cast('pk', TextField()))
-                        .values('object_id'))
-        stale_entries = (IndexEntry._default_manager.using(self.db_alias)
-                         .for_models(self.model)
-                         .exclude(object_id__in=existing_pks))
-        stale_entries.delete()
+            return 0
+        connection = connections[self.db_alias]
+        model_sql, model_params = get_sql(
+            self.model._default_manager.using(self.db_alias)
+            .order_by().values('pk'))
+        content_types_pks = get_descendants_content_types_pks(
+            (self.model,), self.db_alias)
+        if not content_types_pks:
+            return 0
+        # Casts object ids to the type of primary keys instead of
+        # the opposite, so that the primary key index can be used.
+        typed_object_id_sql = 'index_entry.object_id::%s' % (
+            self.model._meta.pk.rel_db_type(connection))
+        if (self.use_typed_object_id() and
+                self.typed_object_id_column is not None):
+            typed_object_id_sql = ('index_entry.%s'
+                                   % self.typed_object_id_column)
+        sql = """
+            DELETE FROM %s
+            WHERE id IN (
+                SELECT index_entry.id
+                FROM %s AS index_entry
+                WHERE index_entry.content_type_id IN (%s)
+                    AND NOT EXISTS (
+                        SELECT 1
+                        FROM (%s) AS obj
+                        WHERE obj."%s" = %s
+                    )
+                LIMIT %%s
+            );
+            """ % (self.db_table, self.db_table,
+                   ', '.join(['%s'] * len(content_types_pks)), model_sql,
+                   get_pk_column(self.model), typed_object_id_sql)
+        params = content_types_pks + list(model_params)
+        batch_size = self.get_delete_batch_size()
+        deleted = 0
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params + [batch_size])
+                deleted += cursor.rowcount
+            if cursor.rowcount < batch_size:
+                break
+        if deleted:
+            self.backend.invalidate_cached_results(self.db_alias,
+                                                   (self.model,))
+        return deleted
 
     def get_config(self):
         return self.backend.params.get('SEARCH_CONFIG')
 
-    def prepare_value(self, value):
-        if isinstance(value, string_types):
-            return value
-        if isinstance(value, list):
-            return ', '.join(self.prepare_value(item) for item in value)
-        if isinstance(value, dict):
-            return ', '.join(self.prepare_value(item)
-                             for item in value.values())
-        return force_text(value)
-
-    def prepare_field(self, obj, field):
-        if isinstance(field, SearchField):
-            yield (unidecode(self.prepare_value(field.get_value(obj))),
-                   get_weight(field.boost))
-        elif isinstance(field, RelatedFields):
-            sub_obj = getattr(obj, field.field_name)
-            if sub_obj is None:
-                return
-            if callable(sub_obj):
-                sub_obj = sub_obj()
-            if isinstance(sub_obj, Manager):
-                sub_objs = sub_obj.all()
-            else:
-                sub_objs = [sub_obj]
-            for sub_obj in sub_objs:
-                for sub_field in field.fields:
-                    for value in self.prepare_field(sub_obj, sub_field):
-                        yield value
+    def get_autocomplete_config(self):
+        return self.backend.params.get('AUTOCOMPLETE_CONFIG',
+                                       DEFAULT_AUTOCOMPLETE_CONFIG)
+
+    def get_autocomplete_max_length(self):
+        return self.backend.params.get('AUTOCOMPLETE_MAX_LENGTH',
+                                       DEFAULT_AUTOCOMPLETE_MAX_LENGTH)
+
+    def get_batch_size(self):
+        return self.backend.params.get('INDEX_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+
+    def get_batch_max_bytes(self):
+        return self.backend.params.get('INDEX_BATCH_MAX_BYTES',
+                                       DEFAULT_BATCH_MAX_BYTES)
 
     def prepare_body(self, obj):
-        return [(value, boost) for field in self.search_fields
-                for value, boost in self.prepare_field(obj, field)]
+        return self.plan.extract_body(obj)
+
+    def prepare_autocomplete(self, obj):
+        """
+        Returns the text of fields with ``partial_match`` enabled,
+        truncated so that the autocomplete vector stays small.
+        """
+        remaining_length = self.get_autocomplete_max_length()
+        autocomplete = []
+        for value, boost in self.plan.extract_autocomplete(obj):
+            if remaining_length <= 0:
+                break
+            value = value[:remaining_length]
+            remaining_length -= len(value)
+            autocomplete.append((value, boost))
+        return autocomplete
+
+    def prepare_boost(self, obj):
+        """
+        Returns the boost multiplying the rank of an object,
+        given by its ``get_search_boost`` method if it has one.
+        """
+        get_search_boost = getattr(obj, 'get_search_boost', None)
+        if get_search_boost is None:
+            return 1.0
+        return float(get_search_boost())
+
+    def prepare_digest(self, obj, config):
+        """
+        Returns a digest of everything written to the entry of a prepared
+        object, so that unchanged entries are not written again.
+        """
+        data = [config, self.get_autocomplete_config(), obj._body_,
+                obj._autocomplete_, obj._boost_]
+        return hashlib.md5(json.dumps(data).encode('utf-8')).hexdigest()
 
     def add_item(self, obj):
         self.add_items(self.model, [obj])
 
-    def add_items_upsert(self, connection, content_type_pk, objs, config):
-        vectors_sql = []
-        data_params = []
+    def get_vector_sql(self, body, config):
+        if not body:
+            return "''::tsvector", []
         sql_template = ('to_tsvector(%s)' if config is None
                         else "to_tsvector('%s', %%s)" % config)
         sql_template = 'setweight(%s, %%s)' % sql_template
+        return ('||'.join(sql_template for _ in body),
+                [v for t in body for v in t])
+
+    def get_entry_values(self, content_type_pk, obj, config):
+        """
+        Returns the ``(column, sql, params)`` values
+        of the index entry of a prepared object.
+        """
+        values = [
+            ('content_type_id', '%s', [content_type_pk]),
+            ('object_id', '%s', [obj._object_id]),
+            ('body_search',) + self.get_vector_sql(obj._body_, config),
+            ('autocomplete',) + self.get_vector_sql(
+                obj._autocomplete_, self.get_autocomplete_config()),
+            ('boost', '%s', [obj._boost_]),
+            ('body_digest', '%s', [obj._digest_]),
+        ]
+        if self.typed_object_id_column is not None:
+            values.append((
+                self.typed_object_id_column, '%%s::%s' % (
+                    TYPED_OBJECT_ID_COLUMNS[self.typed_object_id_column]),
+                [obj._object_id]))
+        return values
+
+    def get_body_length_sql(self, connection, vector_sql):
+        """
+        Returns the SQL counting the words of a vector the same way
+        as PostgreSQL ranking functions, or ``None`` if it is not supported.
+        """
+        if connection.pg_version < 90600:  # PostgreSQL < 9.6
+            return
+        # Lexemes without positions count as a single word.
+        return ('(SELECT COALESCE(sum(COALESCE(array_length(positions, 1), '
+                '1)), 0) FROM unnest(%s))' % vector_sql)
+
+    def get_upsert_sql(self, connection, columns, rows_sql):
+        """
+        Returns the SQL inserting or updating the entries selected
+        by ``rows_sql``, whose columns are ``columns``, and the number
+        of words of their body.
+        """
+        insert_columns = list(columns)
+        select_sql = 'entry.*'
+        body_length_sql = self.get_body_length_sql(connection,
+                                                   'entry.body_search')
+        if body_length_sql is not None:
+            insert_columns.append('body_length')
+            select_sql += ', ' + body_length_sql
+        return """
+            INSERT INTO %s(%s)
+            SELECT %s FROM (%s) AS entry(%s)
+            ON CONFLICT (content_type_id, object_id)
+            DO UPDATE SET %s
+            WHERE %s.body_digest IS DISTINCT FROM EXCLUDED.body_digest
+            """ % (self.db_table, ', '.join(insert_columns), select_sql,
+                   rows_sql, ', '.join(columns),
+                   ', '.join('%s = EXCLUDED.%s' % (column, column)
+                             for column in insert_columns
+                             if column not in ('content_type_id',
+                                               'object_id')),
+                   self.db_table)
+
+    def add_items_upsert(self, connection, content_type_pk, objs, config):
+        rows_sql = []
+        data_params = []
         for obj in objs:
-            data_params.extend((content_type_pk, obj._object_id))
-            if obj._body_:
-                vectors_sql.append('||'.join(sql_template for _ in obj._body_))
-                data_params.extend([v for t in obj._body_ for v in t])
-            else:
-                vectors_sql.append("''::tsvector")
-        data_sql = ', '.join(['(%%s, %%s, %s)' % s for s in vectors_sql])
+            rows_sql.append('(%s)' % ', '.join(
+                sql for column, sql, params in obj._entry_values_))
+            data_params.extend(param for column, sql, params
+                               in obj._entry_values_ for param in params)
+        columns = [column for column, sql, params in obj._entry_values_]
+        upsert_sql = self.get_upsert_sql(connection, columns,
+                                         'VALUES %s' % ', '.join(rows_sql))
         with connection.cursor() as cursor:
-            cursor.execute("""
-                INSERT INTO %s(content_type_id, object_id, body_search)
-                (VALUES %s)
-                ON CONFLICT (content_type_id, object_id)
-                DO UPDATE SET body_search = EXCLUDED.body_search
-                """ % (IndexEntry._meta.db_table, data_sql), data_params)
+            cursor.execute(upsert_sql, data_params)
+        return upsert_sql
 
     def add_items_update_then_create(self, content_type_pk, objs, config):
+        fields = {field.column: field
+                  for field in IndexEntry._meta.concrete_fields}
         ids_and_objs = {}
         for obj in objs:
-            obj._search_vector = (
-                ADD([
-                    SearchVector(Value(text), weight=weight, config=config)
-                    for text, weight in obj._body_])
-                if obj._body_ else SearchVector(Value('')))
+            obj._entry_fields_values = {
+                column: RawSQL(sql, params, output_field=fields[column])
+                for column, sql, params in obj._entry_values_
+                if column not in ('content_type_id', 'object_id')}
             ids_and_objs[obj._object_id] = obj
         index_entries = IndexEntry._default_manager.using(self.db_alias)
         index_entries_for_ct = index_entries.filter(
@@ -149,28 +317,205 @@ class Index(object):
         for indexed_id in indexed_ids:
             obj = ids_and_objs[indexed_id]
             index_entries_for_ct.filter(object_id=obj._object_id) \
-                .update(body_search=obj._search_vector)
+                .update(**obj._entry_fields_values)
         to_be_created = []
         for object_id in ids_and_objs:
             if object_id not in indexed_ids:
                 to_be_created.append(IndexEntry(
                     content_type_id=content_type_pk,
                     object_id=object_id,
-                    body_search=ids_and_objs[object_id]._search_vector,
+                    **ids_and_objs[object_id]._entry_fields_values
                 ))
         index_entries.bulk_create(to_be_created)
 
-    def add_items(self, model, objs):
-        content_type_pk = get_content_types_pks((model,), self.db_alias)[0]
-        config = self.get_config()
+    def start_bulk_load(self):
+        """
+        Makes ``add_items`` stream rows using ``COPY`` to a staging table
+        instead of writing them to the index, until ``finish_bulk_load``
+        computes all the search vectors at once.
+        """
+        self.staging_table = '%s_staging' % IndexEntry._meta.db_table
+        with connections[self.db_alias].cursor() as cursor:
+            cursor.execute('DROP TABLE IF EXISTS %s;' % self.staging_table)
+            # Temporary tables are unlogged and private to the connection.
+            cursor.execute("""
+                CREATE TEMPORARY TABLE %s (
+                    content_type_id integer NOT NULL,
+                    object_id text NOT NULL,
+                    position integer NOT NULL,
+                    autocomplete boolean NOT NULL,
+                    weight "char" NOT NULL,
+                    body text NOT NULL,
+                    boost double precision NOT NULL,
+                    body_digest text NOT NULL
+                );
+                """ % self.staging_table)
+
+    def add_items_copy(self, connection, content_type_pk, objs):
+        rows = StringIO()
         for obj in objs:
+            object_id = copy_escape(obj._object_id)
+            # Objects with an empty body still need an index entry.
+            body = obj._body_ or [('', WEIGHTS[-1])]
+            for autocomplete, texts in (('f', body),
+                                        ('t', obj._autocomplete_)):
+                for position, (text, weight) in enumerate(texts):
+                    rows.write('%s\t%s\t%s\t%s\t%s\t%s\t%r\t%s\n' % (
+                        content_type_pk, object_id, position, autocomplete,
+                        weight, copy_escape(force_text(text)), obj._boost_,
+                        obj._digest_))
+        rows.seek(0)
+        copy_sql = ('COPY %s(content_type_id, object_id, position, '
+                    'autocomplete, weight, body, boost, body_digest) '
+                    'FROM STDIN;' % self.staging_table)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(copy_sql, rows)
+        return copy_sql
+
+    def get_aggregated_vector_sql(self, config, autocomplete):
+        sql_template = ('to_tsvector(%s)' if config is None
+                        else "to_tsvector('%s', %%s)" % config)
+        return '||'.join(
+            "setweight(%s, '%s')" % (
+                sql_template % (
+                    "COALESCE(string_agg(body, ' ' ORDER BY position) "
+                    "FILTER (WHERE %sautocomplete AND weight = '%s'), '')"
+                    % ('' if autocomplete else 'NOT ', weight)),
+                weight)
+            for weight in WEIGHTS)
+
+    def finish_bulk_load(self):
+        if self.staging_table is None:
+            return
+        body_sql = self.get_aggregated_vector_sql(self.get_config(), False)
+        autocomplete_sql = self.get_aggregated_vector_sql(
+            self.get_autocomplete_config(), True)
+        columns = ['body_search', 'autocomplete', 'boost', 'body_digest']
+        values_sql = [body_sql, autocomplete_sql, 'max(boost)',
+                      'max(body_digest)']
+        if self.typed_object_id_column is not None:
+            columns.append(self.typed_object_id_column)
+            values_sql.append('object_id::%s' % TYPED_OBJECT_ID_COLUMNS[
+                self.typed_object_id_column])
+        connection = connections[self.db_alias]
+        with connection.cursor() as cursor:
+            cursor.execute(self.get_upsert_sql(
+                connection, ['content_type_id', 'object_id'] + columns, """
+                SELECT content_type_id, object_id, %s
+                FROM %s
+                GROUP BY content_type_id, object_id
+                """ % (', '.join(values_sql), self.staging_table)))
+            cursor.execute('DROP TABLE %s;' % self.staging_table)
+        self.staging_table = None
+
+    def prefetch_related(self, objs):
+        """
+        Yields objects after fetching, chunk by chunk, the relations
+        followed by their ``RelatedFields``, so that preparing them
+        does not run queries for each object.
+        """
+        lookups = self.plan.related_lookups
+        if not lookups:
+            for obj in objs:
+                yield obj
+            return
+        chunk_size = self.get_batch_size()
+        objs = iter(objs)
+        while True:
+            chunk = list(islice(objs, chunk_size))
+            if not chunk:
+                return
+            # Relations already fetched using ``select_related``
+            # or ``prefetch_related`` are not fetched again.
+            prefetch_related_objects(chunk, *lookups)
+            for obj in chunk:
+                yield obj
+
+    def prepare_batches(self, objs, content_type_pk, config):
+        """
+        Prepares objects lazily and yields them in batches bounded
+        by row count, approximate text size and bound parameters count,
+        so that memory usage does not depend on the size of ``objs``.
+        """
+        max_rows = self.get_batch_size()
+        max_bytes = self.get_batch_max_bytes()
+        batch = []
+        batch_bytes = batch_params = 0
+        for obj in self.prefetch_related(objs):
             obj._object_id = force_text(obj.pk)
             obj._body_ = self.prepare_body(obj)
-        connection = connections[self.db_alias]
+            obj._autocomplete_ = self.prepare_autocomplete(obj)
+            obj._boost_ = self.prepare_boost(obj)
+            obj._digest_ = self.prepare_digest(obj, config)
+            obj._entry_values_ = self.get_entry_values(content_type_pk, obj,
+                                                       config)
+            obj_bytes = sum(len(text) for text, weight in obj._body_)
+            obj_params = sum(len(params) for column, sql, params
+                             in obj._entry_values_)
+            if batch and (len(batch) >= max_rows or
+                          batch_bytes + obj_bytes > max_bytes or
+                          batch_params + obj_params > MAX_QUERY_PARAMS):
+                yield batch
+                batch = []
+                batch_bytes = batch_params = 0
+            batch.append(obj)
+            batch_bytes += obj_bytes
+            batch_params += obj_params
+        if batch:
+            yield batch
+
+    def get_changed(self, connection, content_type_pk, objs):
+        """
+        Returns the prepared objects whose entry is missing or has
+        a different digest, in a single query.
+        """
+        object_ids = [obj._object_id for obj in objs]
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT object_id, body_digest FROM %s
+                WHERE content_type_id = %%s AND object_id = ANY(%%s)
+                """ % self.db_table, [content_type_pk, object_ids])
+            digests = dict(cursor.fetchall())
+        return [obj for obj in objs
+                if digests.get(obj._object_id) != obj._digest_]
+
+    def write_items(self, connection, content_type_pk, objs, config):
+        """
+        Writes the entries of prepared objects and returns the executed SQL,
+        or ``None`` if it was executed by the ORM.
+        """
+        if self.staging_table is not None:
+            return self.add_items_copy(connection, content_type_pk, objs)
         if connection.pg_version >= 90500:  # PostgreSQL >= 9.5
-            self.add_items_upsert(connection, content_type_pk, objs, config)
-        else:
-            self.add_items_update_then_create(content_type_pk, objs, config)
+            return self.add_items_upsert(connection, content_type_pk, objs,
+                                         config)
+        self.add_items_update_then_create(content_type_pk, objs, config)
+
+    def add_items(self, model, objs):
+        content_type_pk = get_content_types_pks((model,), self.db_alias)[0]
+        config = self.get_config()
+        connection = connections[self.db_alias]
+        written_count = self.written_count
+        for batch in self.prepare_batches(objs, content_type_pk, config):
+            with measure(self.backend.instrumentation, 'index', model,
+                         self.db_alias, batch_size=len(batch)) as event:
+                changed = self.get_changed(connection, content_type_pk,
+                                           batch)
+                sql = None
+                if changed:
+                    sql = self.write_items(connection, content_type_pk,
+                                           changed, config)
+                if event is not None:
+                    event.update(rows=len(changed), sql=sql,
+                                 skipped=len(batch) - len(changed))
+            self.skipped_count += len(batch) - len(changed)
+            self.written_count += len(changed)
+            # Releases the prepared text as soon as it is written.
+            for obj in batch:
+                del (obj._body_, obj._autocomplete_, obj._boost_,
+                     obj._digest_, obj._entry_values_)
+        if self.written_count > written_count:
+            self.backend.invalidate_cached_results(self.db_alias, (model,))
 
     def __str__(self):
         return self.name
@@ -178,17 +523,27 @@ class Index(object):
 
 class PostgresSearchQuery(BaseSearchQuery):
     DEFAULT_OPERATOR = 'and'
+    vector_field = 'body_search'
+    prefix = False
+    # Set from the ``TYPED_OBJECT_ID`` backend setting.
+    typed_object_id = False
+    # Set from the ``RANK_FUNCTION`` and ``RANK_NORMALIZATION`` settings.
+    rank_function = DEFAULT_RANK_FUNCTION
+    rank_normalization = 0
 
     def __init__(self, *args, **kwargs):
         super(PostgresSearchQuery, self).__init__(*args, **kwargs)
-        self.search_fields = self.queryset.model.get_search_fields()
+        self.search_fields = get_indexing_plan(
+            self.queryset.model).search_fields
 
-    def get_search_query(self, config):
-        combine = OR if self.operator == 'or' else AND
-        search_terms = keyword_split(unidecode(self.query_string))
-        if not search_terms:
-            return SearchQuery('')
-        return combine(SearchQuery(q, config=config) for q in search_terms)
+    def get_search_query(self, config, weights=''):
+        connection = connections[get_db_alias(self.queryset)]
+        return compile_search_query(
+            self.query_string, self.operator, config, weights, self.prefix,
+            phrases=connection.pg_version >= 90600)  # PostgreSQL >= 9.6
+
+    def get_index_config(self, index):
+        return index.get_config()
 
     def get_base_queryset(self):
         # Removes order for performance’s sake.
@@ -196,20 +551,21 @@ class PostgresSearchQuery(BaseSearchQuery):
 
     def get_in_index_queryset(self, queryset, search_query):
         return (IndexEntry._default_manager.using(get_db_alias(queryset))
-                .for_models(queryset.model).filter(body_search=search_query))
+                .for_models(queryset.model)
+                .filter(**{self.vector_field: search_query}))
 
-    def get_in_index_count(self, queryset, search_query):
+    def get_in_index_join_sql(self, queryset, search_query, select='1'):
         index_sql, index_params = get_sql(
-            self.get_in_index_queryset(queryset, search_query).pks())
+            self.get_in_index_queryset(queryset, search_query)
+            .pks(queryset.model, self.typed_object_id))
         model_sql, model_params = get_sql(queryset)
         sql = """
-            SELECT COUNT(*)
+            SELECT %s
             FROM (%s) AS index_entry
-            INNER JOIN (%s) AS obj ON obj."%s" = index_entry.typed_pk;
-            """ % (index_sql, model_sql, get_pk_column(queryset.model))
-        with connections[get_db_alias(queryset)].cursor() as cursor:
-            cursor.execute(sql, index_params + model_params)
-            return cursor.fetchone()[0]
+            INNER JOIN (%s) AS obj ON obj."%s" = index_entry.typed_pk
+            """ % (select, index_sql, model_sql,
+                   get_pk_column(queryset.model))
+        return sql, index_params + model_params
 
     def get_boost(self, field_name, fields=None):
         if fields is None:
@@ -227,36 +583,116 @@ class PostgresSearchQuery(BaseSearchQuery):
                     return self.get_boost(sub_field_name, field.fields)
                 return field.boost
 
+    def get_fields_weights(self):
+        return ''.join(sorted({get_weight(self.get_boost(field))
+                               for field in self.fields}))
+
     def get_in_fields_queryset(self, queryset, search_query):
         if not self.fields:
             return queryset.none()
+        # Index entries store the weight of each lexeme, so the GIN index
+        # narrows down the search to objects matching in fields having
+        # the same weights, before checking the fields themselves.
+        weighted_query = self.get_search_query(
+            search_query.config, weights=self.get_fields_weights())
+        candidates = self.get_in_index_queryset(queryset, weighted_query)
         return (
-            queryset.annotate(
+            queryset.filter(pk__in=candidates.pks(queryset.model,
+                                                  self.typed_object_id))
+            .annotate(
                 _search_=ADD(
                     SearchVector(field, config=search_query.config,
                                  weight=get_weight(self.get_boost(field)))
                     for field in self.fields))
             .filter(_search_=search_query))
 
-    def search_count(self, config):
+    def get_matches_sql(self, config):
+        """
+        Returns the SQL and parameters selecting the objects
+        matching the search, without ranking them.
+        """
         queryset = self.get_base_queryset()
         search_query = self.get_search_query(config=config)
         if self.fields is None:
-            return self.get_in_index_count(queryset, search_query)
-        return self.get_in_fields_queryset(queryset, search_query).count()
+            return self.get_in_index_join_sql(queryset, search_query)
+        return get_sql(self.get_in_fields_queryset(queryset, search_query))
+
+    def get_count_sql(self, config):
+        sql, params = self.get_matches_sql(config)
+        return 'SELECT COUNT(*) FROM (%s) AS matches' % sql, params
+
+    def execute_count(self, sql, params):
+        with connections[get_db_alias(self.queryset)].cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchone()[0]
+
+    def search_count(self, config):
+        return self.execute_count(*self.get_count_sql(config))
+
+    def search_count_estimate(self, config):
+        """
+        Returns the number of results estimated by the query planner,
+        which is much faster than counting them for broad searches.
+        """
+        sql, params = self.get_matches_sql(config)
+        with connections[get_db_alias(self.queryset)].cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) %s' % sql, params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, string_types):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    def get_facet_field(self, field_name):
+        model = self.queryset.model
+        field = self._get_filterable_field(field_name)
+        if field is not None:
+            try:
+                return field.get_field(model)
+            except FieldDoesNotExist:
+                pass
+        raise FieldError(
+            'Cannot facet search results with field "%s". Please add '
+            'index.FilterField(\'%s\') to %s.search_fields.'
+            % (field_name, field_name, model.__name__))
+
+    def facet(self, config, field_name):
+        """
+        Returns the number of results for each value of a filter field,
+        most frequent values first, counted in a single query.
+        """
+        field = self.get_facet_field(field_name)
+        queryset = self.get_base_queryset()
+        search_query = self.get_search_query(config=config)
+        if self.fields is not None:
+            return OrderedDict(
+                self.get_in_fields_queryset(queryset, search_query)
+                .values_list(field.attname).annotate(count=Count('pk'))
+                .order_by('-count', field.attname))
+        sql, params = self.get_in_index_join_sql(
+            queryset, search_query, select='obj."%s" AS value' % field.column)
+        with connections[get_db_alias(queryset)].cursor() as cursor:
+            cursor.execute("""
+                SELECT value, COUNT(*) AS count
+                FROM (%s) AS matches
+                GROUP BY value
+                ORDER BY count DESC, value;
+                """ % sql, params)
+            return OrderedDict(cursor.fetchall())
 
     def search_in_index(self, queryset, search_query, start, stop):
+        model = queryset.model
         index_entries = self.get_in_index_queryset(queryset, search_query)
         if self.order_by_relevance:
-            index_entries = index_entries.rank(search_query)
+            index_entries = index_entries.rank(
+                search_query, self.vector_field, self.rank_function,
+                self.rank_normalization)
         index_sql, index_params = get_sql(
-            index_entries.annotate_typed_pk()
+            index_entries.annotate_typed_pk(model, self.typed_object_id)
             .values('typed_pk', 'rank')
         )
         model_sql, model_params = get_sql(queryset)
-        model = queryset.model
         sql = """
-            SELECT obj.*
+            SELECT obj.*, COUNT(*) OVER () AS _total_count_
             FROM (%s) AS index_entry
             INNER JOIN (%s) AS obj ON obj."%s" = index_entry.typed_pk
             ORDER BY index_entry.rank DESC
@@ -266,46 +702,201 @@ class PostgresSearchQuery(BaseSearchQuery):
         return model._default_manager.using(get_db_alias(queryset)).raw(
             sql, index_params + model_params + limits)
 
+    def search_in_index_top(self, queryset, search_query, start, stop,
+                            overfetch):
+        """
+        Ranks index entries alone to only fetch the best ones from the model
+        table. Fetches ``overfetch`` times more entries than needed in case
+        the queryset filters some of them out, and falls back
+        to ``search_in_index`` if too many of them are filtered out.
+        """
+        limit = int(stop * overfetch)
+        candidates = list(
+            self.get_in_index_queryset(queryset, search_query)
+            .rank(search_query, self.vector_field, self.rank_function,
+                  self.rank_normalization)
+            .pks(queryset.model, self.typed_object_id)[:limit])
+        positions = {pk: position for position, pk in enumerate(candidates)}
+        objs = sorted(queryset.filter(pk__in=candidates),
+                      key=lambda obj: positions[obj.pk])
+        if len(objs) >= stop or len(candidates) < limit:
+            return objs[start:stop]
+        return self.search_in_index(queryset, search_query, start, stop)
+
     def search_in_fields(self, queryset, search_query, start, stop):
+        rank = NormalizedSearchRank(F('_search_'), search_query,
+                                    weights=WEIGHTS_VALUES,
+                                    function=self.rank_function,
+                                    normalization=self.rank_normalization)
         return (self.get_in_fields_queryset(queryset, search_query)
-                .annotate(_rank_=SearchRank(F('_search_'), search_query,
-                                            weights=WEIGHTS_VALUES))
+                .annotate(_rank_=rank,
+                          _total_count_=RawSQL('COUNT(*) OVER ()', ()))
                 .order_by('-_rank_'))[start:stop]
 
-    def search(self, config, start, stop):
+    def search(self, config, start, stop, overfetch=None):
         queryset = self.get_base_queryset()
         if self.query_string is None:
             return queryset[start:stop]
         search_query = self.get_search_query(config=config)
         if self.fields is None:
+            if (overfetch is not None and self.order_by_relevance and
+                    stop is not None):
+                return self.search_in_index_top(queryset, search_query,
+                                                start, stop, overfetch)
             return self.search_in_index(queryset, search_query, start, stop)
         return self.search_in_fields(queryset, search_query, start, stop)
 
 
+class PostgresAutocompleteQuery(PostgresSearchQuery):
+    """
+    Matches the beginning of words from fields with ``partial_match``
+    enabled, as users type them.
+    """
+    vector_field = 'autocomplete'
+    prefix = True
+
+    def get_index_config(self, index):
+        return index.get_autocomplete_config()
+
+
 class PostgresSearchResult(BaseSearchResults):
+    def __init__(self, backend, query, prefetch_related=None):
+        super(PostgresSearchResult, self).__init__(
+            backend, query, prefetch_related=prefetch_related)
+        query.typed_object_id = backend.params.get('TYPED_OBJECT_ID', False)
+        query.rank_function = backend.params.get('RANK_FUNCTION',
+                                                 DEFAULT_RANK_FUNCTION)
+        query.rank_normalization = backend.params.get('RANK_NORMALIZATION', 0)
+        # Number of results regardless of slicing, shared with clones
+        # so that fetching a page also counts the results of the others.
+        self._total_count = {}
+
+    def _clone(self):
+        new = super(PostgresSearchResult, self)._clone()
+        new._total_count = self._total_count
+        return new
+
     def get_config(self):
         queryset = self.query.queryset
-        return self.backend.get_index_for_model(
-            queryset.model, queryset._db).get_config()
+        return self.query.get_index_config(self.backend.get_index_for_model(
+            queryset.model, queryset._db))
+
+    def get_overfetch(self):
+        params = self.backend.params
+        if params.get('TWO_PHASE_SEARCH', False):
+            return params.get('TWO_PHASE_OVERFETCH',
+                              DEFAULT_TWO_PHASE_OVERFETCH)
+
+    def get_cache_key(self, *parts):
+        query = self.query
+        queryset = query.queryset
+        query_string = query.query_string
+        if query_string is not None:
+            query_string = ' '.join(query_string.lower().split())
+        fields = None if query.fields is None else tuple(query.fields)
+        return self.backend.results_cache.get_key(
+            queryset.model, get_db_alias(queryset), type(query).__name__,
+            query_string, query.operator, fields, query.order_by_relevance,
+            get_sql(queryset), self.get_config(), *parts)
 
     def _do_search(self):
-        return list(self.query.search(self.get_config(),
-                                      self.start, self.stop))
+        results_cache = self.backend.results_cache
+        if results_cache is not None:
+            key = self.get_cache_key('search', self.start, self.stop)
+            cached = results_cache.get(key)
+            if cached is not None:
+                pks, total_count = cached
+                if total_count is not None:
+                    self._total_count['value'] = total_count
+                objs = self.query.get_base_queryset().in_bulk(pks)
+                return [objs[pk] for pk in pks if pk in objs]
+        queryset = self.query.queryset
+        with measure(self.backend.instrumentation, 'search', queryset.model,
+                     get_db_alias(queryset), start=self.start,
+                     stop=self.stop) as event:
+            results = self.query.search(self.get_config(),
+                                        self.start, self.stop,
+                                        overfetch=self.get_overfetch())
+            if event is not None:
+                event['sql'], event['params'] = get_results_sql(results)
+            results = list(results)
+            if event is not None:
+                event['rows'] = len(results)
+        if results and hasattr(results[0], '_total_count_'):
+            self._total_count['value'] = results[0]._total_count_
+        if results_cache is not None:
+            results_cache.set(key, ([obj.pk for obj in results],
+                                    self._total_count.get('value')))
+        return results
+
+    def search_count(self):
+        queryset = self.query.queryset
+        sql, params = self.query.get_count_sql(self.get_config())
+        with measure(self.backend.instrumentation, 'count', queryset.model,
+                     get_db_alias(queryset), sql=sql, params=params) as event:
+            total_count = self.query.execute_count(sql, params)
+            if event is not None:
+                event['rows'] = total_count
+        return total_count
+
+    def get_total_count(self):
+        results_cache = self.backend.results_cache
+        if results_cache is None:
+            return self.search_count()
+        key = self.get_cache_key('count')
+        total_count = results_cache.get(key)
+        if total_count is None:
+            total_count = self.search_count()
+            results_cache.set(key, total_count)
+        return total_count
 
     def _do_count(self):
-        return self.query.search_count(self.get_config())
+        if 'value' not in self._total_count:
+            self._total_count['value'] = self.get_total_count()
+        count = max(self._total_count['value'] - self.start, 0)
+        if self.stop is not None:
+            count = min(count, self.stop - self.start)
+        return count
+
+    def facet(self, field_name):
+        """
+        Returns an ``OrderedDict`` of the number of results
+        for each value of ``field_name``, which must be a ``FilterField``.
+        """
+        results_cache = self.backend.results_cache
+        if results_cache is None:
+            return self.query.facet(self.get_config(), field_name)
+        key = self.get_cache_key('facet', field_name)
+        facet = results_cache.get(key)
+        if facet is None:
+            facet = self.query.facet(self.get_config(), field_name)
+            results_cache.set(key, facet)
+        return facet
+
+    def estimated_count(self):
+        if 'value' in self._total_count:
+            return self._total_count['value']
+        return self.query.search_count_estimate(self.get_config())
 
 
 class PostgresSearchRebuilder:
     def __init__(self, index):
         self.index = index
 
+    def start_bulk_load(self):
+        connection = connections[self.index.db_alias]
+        if (self.index.backend.params.get('COPY_REBUILD', False) and
+                connection.pg_version >= 90500):  # PostgreSQL >= 9.5
+            self.index.start_bulk_load()
+
     def start(self):
         self.index.delete_stale_entries()
+        self.start_bulk_load()
         return self.index
 
     def finish(self):
-        pass
+        self.index.finish_bulk_load()
+        self.index.backend.invalidate_cached_results(self.index.db_alias)
 
 
 class PostgresSearchAtomicRebuilder(PostgresSearchRebuilder):
@@ -319,28 +910,186 @@ class PostgresSearchAtomicRebuilder(PostgresSearchRebuilder):
         self.transaction_opened = True
         return super(PostgresSearchAtomicRebuilder, self).start()
 
-    def finish(self):
-        self.transaction.__exit__(None, None, None)
+    def exit_transaction(self, exc_type=None, exc_value=None,
+                         traceback=None):
         self.transaction_opened = False
+        self.transaction.__exit__(exc_type, exc_value, traceback)
+
+    def finish(self):
+        exc_info = (None, None, None)
+        try:
+            self.index.finish_bulk_load()
+        except Exception:
+            exc_info = sys.exc_info()
+            raise
+        finally:
+            # Rolls back the whole rebuild if loading failed.
+            self.exit_transaction(*exc_info)
+        # Only once the rebuilt entries are visible to other connections.
+        self.index.backend.invalidate_cached_results(self.index.db_alias)
 
     def __del__(self):
-        # TODO: Implement a cleaner way to close the connection on failure.
+        # The rebuild failed before finishing, so it is rolled back
+        # instead of loading the entries staged so far.
         if self.transaction_opened:
-            self.transaction.needs_rollback = True
-            self.finish()
+            self.index.staging_table = None
+            connections[self.index.db_alias].needs_rollback = True
+            self.exit_transaction()
+
+
+class PostgresSearchShadowRebuilder(PostgresSearchRebuilder):
+    """
+    Rebuilds the index of a model in a shadow table only containing its
+    entries, then replaces its entries in the index table with the rebuilt
+    ones in a single transaction.
+
+    Searches never wait and never see a partially rebuilt model. Merging
+    only locks the entries of the model, so index writes of other models
+    never wait either. Entries written or removed during the rebuild
+    are more recent than the rebuilt ones, so they are kept as they are.
+    """
+
+    def __init__(self, index):
+        super(PostgresSearchShadowRebuilder, self).__init__(index)
+        self.table = IndexEntry._meta.db_table
+        # Temporary tables, private to the connection of the rebuild.
+        self.shadow_table = '%s_shadow' % self.table
+        self.snapshot_table = '%s_snapshot' % self.table
+        self.content_types_pks = get_content_types_pks((index.model,),
+                                                       index.db_alias)
+
+    def get_columns(self):
+        return [field.column for field in IndexEntry._meta.concrete_fields
+                if not field.primary_key]
+
+    def start(self):
+        connection = connections[self.index.db_alias]
+        if connection.pg_version < 90500:  # PostgreSQL < 9.5
+            raise NotSupportedError(
+                'Shadow rebuilds require PostgreSQL >= 9.5.')
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TABLE IF EXISTS %s, %s;'
+                           % (self.shadow_table, self.snapshot_table))
+            cursor.execute(
+                'CREATE TEMPORARY TABLE %s AS SELECT %s FROM %s '
+                'WITH NO DATA;' % (self.shadow_table,
+                                   ', '.join(self.get_columns()), self.table))
+            # Upserts need the unique constraint while loading.
+            cursor.execute('ALTER TABLE %s ADD UNIQUE (content_type_id, '
+                           'object_id);' % self.shadow_table)
+            # Entries written during the rebuild no longer have the xmin
+            # (the transaction that wrote them) of this snapshot.
+            cursor.execute("""
+                CREATE TEMPORARY TABLE %s AS
+                SELECT content_type_id, object_id, xmin AS entry_xmin
+                FROM %s WHERE content_type_id = ANY(%%s);
+                """ % (self.snapshot_table, self.table),
+                [self.content_types_pks])
+            cursor.execute('ALTER TABLE %s ADD PRIMARY KEY (content_type_id, '
+                           'object_id);' % self.snapshot_table)
+        self.index.db_table = self.shadow_table
+        self.start_bulk_load()
+        return self.index
+
+    def merge(self, cursor):
+        """
+        Replaces the entries of the model with the rebuilt ones, except
+        those written or removed since the snapshot. Entries concurrently
+        written while merging are skipped the same way, as PostgreSQL
+        checks their new xmin again before writing them.
+        """
+        columns = self.get_columns()
+        updated_columns = [column for column in columns
+                           if column not in ('content_type_id', 'object_id')]
+        # Entries of objects that were not rebuilt.
+        cursor.execute("""
+            DELETE FROM %s AS live
+            USING %s AS snapshot
+            WHERE live.content_type_id = snapshot.content_type_id
+                AND live.object_id = snapshot.object_id
+                AND live.xmin = snapshot.entry_xmin
+                AND NOT EXISTS (
+                    SELECT 1 FROM %s AS shadow
+                    WHERE shadow.content_type_id = live.content_type_id
+                        AND shadow.object_id = live.object_id);
+            """ % (self.table, self.snapshot_table, self.shadow_table))
+        cursor.execute("""
+            UPDATE %s AS live SET %s
+            FROM %s AS shadow, %s AS snapshot
+            WHERE live.content_type_id = shadow.content_type_id
+                AND live.object_id = shadow.object_id
+                AND snapshot.content_type_id = live.content_type_id
+                AND snapshot.object_id = live.object_id
+                AND live.xmin = snapshot.entry_xmin
+                AND (%s) IS DISTINCT FROM (%s);
+            """ % (self.table,
+                   ', '.join('%s = shadow.%s' % (column, column)
+                             for column in updated_columns),
+                   self.shadow_table, self.snapshot_table,
+                   ', '.join('live.%s' % column
+                             for column in updated_columns),
+                   ', '.join('shadow.%s' % column
+                             for column in updated_columns)))
+        # Entries of objects created during the rebuild, unless they were
+        # also indexed or removed from the index in the meantime.
+        cursor.execute("""
+            INSERT INTO %s(%s)
+            SELECT %s FROM %s AS shadow
+            WHERE NOT EXISTS (
+                SELECT 1 FROM %s AS snapshot
+                WHERE snapshot.content_type_id = shadow.content_type_id
+                    AND snapshot.object_id = shadow.object_id)
+            ON CONFLICT (content_type_id, object_id) DO NOTHING;
+            """ % (self.table, ', '.join(columns), ', '.join(columns),
+                   self.shadow_table, self.snapshot_table))
+
+    def finish(self):
+        self.index.finish_bulk_load()
+        self.index.db_table = self.table
+        connection = connections[self.index.db_alias]
+        with transaction.atomic(using=self.index.db_alias):
+            with connection.cursor() as cursor:
+                # Temporary tables are not analyzed automatically.
+                cursor.execute('ANALYZE %s;' % self.shadow_table)
+                cursor.execute('ANALYZE %s;' % self.snapshot_table)
+                self.merge(cursor)
+                cursor.execute('DROP TABLE %s, %s;'
+                               % (self.shadow_table, self.snapshot_table))
+        self.index.backend.invalidate_cached_results(self.index.db_alias,
+                                                     (self.index.model,))
 
 
 class PostgresSearchBackend(BaseSearchBackend):
     query_class = PostgresSearchQuery
+    autocomplete_query_class = PostgresAutocompleteQuery
     results_class = PostgresSearchResult
     rebuilder_class = PostgresSearchRebuilder
     atomic_rebuilder_class = PostgresSearchAtomicRebuilder
+    shadow_rebuilder_class = PostgresSearchShadowRebuilder
 
     def __init__(self, params):
         super(PostgresSearchBackend, self).__init__(params)
         self.params = params
-        if params.get('ATOMIC_REBUILD', False):
+        if params.get('RANK_FUNCTION',
+                      DEFAULT_RANK_FUNCTION) not in RANK_FUNCTIONS:
+            raise ImproperlyConfigured(
+                'RANK_FUNCTION must be one of: %s.'
+                % ', '.join(RANK_FUNCTIONS))
+        if params.get('SHADOW_REBUILD', False):
+            self.rebuilder_class = self.shadow_rebuilder_class
+        elif params.get('ATOMIC_REBUILD', False):
             self.rebuilder_class = self.atomic_rebuilder_class
+        self.instrumentation = None
+        if params.get('INSTRUMENTATION'):
+            self.instrumentation = Instrumentation(
+                params['INSTRUMENTATION'], params.get('SLOW_SEARCH_THRESHOLD'),
+                params.get('SLOW_SEARCH_ANALYZE_RATE', 0))
+        self.results_cache = None
+        if params.get('RESULTS_CACHE'):
+            self.results_cache = ResultsCache(
+                params['RESULTS_CACHE'],
+                params.get('RESULTS_CACHE_TIMEOUT',
+                           DEFAULT_RESULTS_CACHE_TIMEOUT))
 
     def get_index_for_model(self, model, db_alias=None):
         return Index(self, model, db_alias)
@@ -348,9 +1097,50 @@ class PostgresSearchBackend(BaseSearchBackend):
     def get_index_for_object(self, obj):
         return self.get_index_for_model(obj._meta.model, obj._state.db)
 
+    def invalidate_cached_results(self, db_alias, models=None):
+        """
+        Invalidates the cached results of searches on the given models,
+        or on all models if ``models`` is ``None``.
+        """
+        if self.results_cache is None:
+            return
+        if models is None:
+            self.results_cache.invalidate_all(db_alias)
+        else:
+            self.results_cache.invalidate(
+                get_content_types_pks(tuple(models), db_alias), db_alias)
+
     def reset_index(self):
         for connection in get_postgresql_connections():
             IndexEntry._default_manager.using(connection.alias).delete()
+            self.invalidate_cached_results(connection.alias)
+
+    def autocomplete(self, query_string, model_or_queryset, fields=None,
+                     filters=None, prefetch_related=None, operator=None,
+                     order_by_relevance=True):
+        results = self.search(query_string, model_or_queryset, fields=fields,
+                              filters=filters,
+                              prefetch_related=prefetch_related,
+                              operator=operator,
+                              order_by_relevance=order_by_relevance)
+        if isinstance(results, self.results_class):
+            query = results.query
+            results.query = self.autocomplete_query_class(
+                query.queryset, query.query_string, fields=query.fields,
+                operator=query.operator,
+                order_by_relevance=query.order_by_relevance)
+            results.query.typed_object_id = query.typed_object_id
+            results.query.rank_function = query.rank_function
+            results.query.rank_normalization = query.rank_normalization
+        return results
+
+    def suggest(self, query_string, db_alias=None):
+        """
+        Returns a spelling correction of ``query_string`` using the lexicon
+        built by ``refresh_pgsearch_lexicon``, or ``None`` if there is none.
+        """
+        return get_suggestion(query_string, self.params.get('SEARCH_CONFIG'),
+                              db_alias or DEFAULT_DB_ALIAS)
 
     def add_type(self, model):
         pass  # Not needed.
@@ -358,15 +1148,112 @@ class PostgresSearchBackend(BaseSearchBackend):
     def refresh_index(self):
         pass  # Not needed.
 
+    def is_queued(self):
+        return self.params.get('QUEUED', False)
+
     def add(self, obj):
+        if self.is_queued():
+            enqueue(obj._meta.model, [obj], IndexQueueEntry.ADD)
+            return
         self.get_index_for_object(obj).add_item(obj)
 
     def add_bulk(self, model, obj_list):
+        if self.is_queued():
+            enqueue(model, obj_list, IndexQueueEntry.ADD)
+            return
         if obj_list:
             self.get_index_for_object(obj_list[0]).add_items(model, obj_list)
 
     def delete(self, obj):
-        IndexEntry._default_manager.for_object(obj).delete()
+        if self.is_queued():
+            enqueue(obj._meta.model, [obj], IndexQueueEntry.DELETE)
+            return
+        if getattr(_deferred, 'deletes', None) is not None:
+            _deferred.deletes.add(self, obj)
+            return
+        self.delete_bulk(obj._meta.model, [obj])
+
+    def delete_bulk(self, model, objs_or_pks, db_alias=None):
+        """
+        Removes objects from the index using a single query per database
+        and batch. Objects can be given as instances or as primary keys,
+        in which case they are removed from ``db_alias``
+        (the default database by default).
+        """
+        if db_alias is None:
+            db_alias = DEFAULT_DB_ALIAS
+        if self.is_queued():
+            enqueue(model, objs_or_pks, IndexQueueEntry.DELETE, db_alias)
+            return
+        object_ids_by_db = OrderedDict()
+        for obj in objs_or_pks:
+            obj_db_alias, pk = get_db_alias_and_pk(obj, db_alias)
+            object_ids_by_db.setdefault(obj_db_alias, OrderedDict())[
+                force_text(pk)] = None
+        for db_alias, object_ids in object_ids_by_db.items():
+            object_ids = list(object_ids)
+            entries = (IndexEntry._default_manager.using(db_alias)
+                       .for_models(model))
+            batch_size = self.get_index_for_model(
+                model, db_alias).get_delete_batch_size()
+            for start in range(0, len(object_ids), batch_size):
+                entries.filter(object_id__in=object_ids[
+                    start:start + batch_size]).delete()
+            self.invalidate_cached_results(db_alias, (model,))
+
+
+class DeferredDeletes(object):
+    """
+    Primary keys of the objects removed from the index within
+    ``deferred_deletes``, grouped by model and database so that
+    they are removed in bulk.
+    """
+
+    def __init__(self):
+        self.pks = OrderedDict()
+
+    def add(self, backend, obj):
+        # Signal handlers get a new backend each time, so backends
+        # are only distinguished by the cache of their results.
+        db_alias = obj._state.db or DEFAULT_DB_ALIAS
+        backends, pks = self.pks.setdefault(
+            (obj._meta.model, db_alias), (OrderedDict(), []))
+        backends.setdefault(backend.params.get('RESULTS_CACHE'), backend)
+        # Read now, as Django unsets primary keys of deleted objects
+        # after sending their ``post_delete`` signal.
+        pks.append(obj.pk)
+
+    def flush(self):
+        for (model, db_alias), (backends, pks) in self.pks.items():
+            backends = list(backends.values())
+            backends[0].delete_bulk(model, pks, db_alias)
+            for backend in backends[1:]:
+                backend.invalidate_cached_results(db_alias, (model,))
+        self.pks.clear()
+
+
+_deferred = local()
+
+
+@contextmanager
+def deferred_deletes():
+    """
+    Groups the objects removed from the index in this block,
+    including by signal handlers, and removes them in bulk at its end::
+
+        with deferred_deletes():
+            MyModel.objects.filter(live=False).delete()
+    """
+    if getattr(_deferred, 'deletes', None) is not None:
+        # Already grouped by an outer block.
+        yield
+        return
+    _deferred.deletes = DeferredDeletes()
+    try:
+        yield
+        _deferred.deletes.flush()
+    finally:
+        _deferred.deletes = None
 
 
 SearchBackend = PostgresSearchBackend
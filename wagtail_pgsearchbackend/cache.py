@@ -0,0 +1,71 @@
+from __future__ import absolute_import, unicode_literals
+
+import hashlib
+import time
+
+from django.core.cache import caches
+
+from .utils import get_descendants_content_types_pks
+
+KEY_PREFIX = 'wagtail_pgsearchbackend'
+
+
+def new_generation():
+    # Based on time so that an evicted generation is never reused.
+    return int(time.time() * 1000000)
+
+
+class ResultsCache(object):
+    """
+    Caches search results as lists of primary keys.
+
+    Each content type has a generation number, changed whenever its index
+    entries change. Cache keys include the generations of the searched
+    content types, so results are invalidated as soon as they may change.
+    """
+
+    def __init__(self, alias, timeout):
+        self.cache = caches[alias]
+        self.timeout = timeout
+
+    def get_generation_keys(self, content_types_pks, db_alias):
+        return ['%s:generation:%s:%s' % (KEY_PREFIX, db_alias, pk)
+                for pk in content_types_pks]
+
+    def get_generations(self, model, db_alias):
+        # The ``all`` generation is only changed by ``invalidate_all``.
+        keys = self.get_generation_keys(
+            ['all'] + sorted(get_descendants_content_types_pks((model,),
+                                                               db_alias)),
+            db_alias)
+        generations = self.cache.get_many(keys)
+        for key in keys:
+            if key not in generations:
+                self.cache.add(key, new_generation(), None)
+                generations[key] = self.cache.get(key)
+        return [generations[key] for key in keys]
+
+    def increment(self, keys):
+        for key in keys:
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                self.cache.set(key, new_generation(), None)
+
+    def invalidate(self, content_types_pks, db_alias):
+        self.increment(self.get_generation_keys(content_types_pks, db_alias))
+
+    def invalidate_all(self, db_alias):
+        self.increment(self.get_generation_keys(['all'], db_alias))
+
+    def get_key(self, model, db_alias, *parts):
+        parts = (model._meta.label, db_alias,
+                 self.get_generations(model, db_alias)) + parts
+        digest = hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+        return '%s:results:%s' % (KEY_PREFIX, digest)
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value):
+        self.cache.set(key, value, self.timeout)
@@ -0,0 +1,144 @@
+from __future__ import absolute_import, unicode_literals
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.utils import truncate_name
+
+from .models import IndexEntry
+from .utils import get_descendants_content_types_pks
+
+VECTOR_FIELDS = ('body_search', 'autocomplete')
+
+
+def get_table():
+    return IndexEntry._meta.db_table
+
+
+def get_storage_parameters(params):
+    """
+    Returns the storage parameters of GIN indexes from the ``GIN_FASTUPDATE``
+    and ``GIN_PENDING_LIST_LIMIT`` (in kilobytes) backend settings.
+    """
+    storage = []
+    if 'GIN_FASTUPDATE' in params:
+        storage.append('fastupdate = %s'
+                       % ('on' if params['GIN_FASTUPDATE'] else 'off'))
+    if 'GIN_PENDING_LIST_LIMIT' in params:
+        storage.append('gin_pending_list_limit = %d'
+                       % params['GIN_PENDING_LIST_LIMIT'])
+    return ', '.join(storage)
+
+
+def get_storage_sql(params):
+    storage = get_storage_parameters(params)
+    return ' WITH (%s)' % storage if storage else ''
+
+
+def get_index_name(connection, *parts):
+    return truncate_name('_'.join((get_table(),) + parts),
+                         connection.ops.max_name_length())
+
+
+def index_exists(connection, name, table=None):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_indexes '
+                       'WHERE tablename = %s AND indexname = %s;',
+                       [table or get_table(), name])
+        return cursor.fetchone() is not None
+
+
+def get_index_sql(connection, name, definition, params, concurrently):
+    """
+    Returns the SQL creating and dropping an index. The creation SQL is
+    ``None`` if the index already exists on PostgreSQL < 9.5, which does
+    not support ``CREATE INDEX IF NOT EXISTS``.
+    """
+    concurrently = ' CONCURRENTLY' if concurrently else ''
+    drop_sql = 'DROP INDEX%s IF EXISTS %s;' % (concurrently, name)
+    if connection.pg_version >= 90500:  # PostgreSQL >= 9.5
+        if_not_exists = ' IF NOT EXISTS'
+    elif index_exists(connection, name):
+        return None, drop_sql
+    else:
+        if_not_exists = ''
+    return ('CREATE INDEX%s%s %s ON %s %s;'
+            % (concurrently, if_not_exists, name, get_table(),
+               definition % get_storage_sql(params)),
+            drop_sql)
+
+
+def get_composite_index_sql(connection, vector_field, params,
+                            concurrently=True):
+    """
+    Returns the SQL creating and dropping a GIN index on content types
+    and a search vector, so that searches on a few content types only
+    read the postings of these content types.
+    Requires the ``btree_gin`` extension.
+    """
+    return get_index_sql(
+        connection, get_index_name(connection, 'content_type', vector_field),
+        'USING GIN(content_type_id, %s)%%s' % vector_field,
+        params, concurrently)
+
+
+def get_partial_index_sql(connection, model, vector_field, params,
+                          concurrently=True):
+    """
+    Returns the SQL creating and dropping a GIN index only containing
+    the entries of a model and its descendants.
+
+    Models created afterwards are not part of the index,
+    so it has to be created again when adding a child model.
+    """
+    content_types_pks = get_descendants_content_types_pks((model,),
+                                                          connection.alias)
+    return get_index_sql(
+        connection,
+        get_index_name(connection, vector_field, model._meta.db_table),
+        'USING GIN(%s)%%s WHERE content_type_id IN (%s)' % (
+            vector_field,
+            ', '.join(str(pk) for pk in sorted(content_types_pks))),
+        params, concurrently)
+
+
+def get_storage_update_sql(connection, vector_field, params):
+    """
+    Returns the SQL applying the storage settings to the GIN index
+    created by migrations, unless it was dropped or renamed.
+    """
+    storage = get_storage_parameters(params)
+    name = '%s_%s' % (get_table(), vector_field)
+    if not storage or not index_exists(connection, name):
+        return
+    return 'ALTER INDEX %s SET (%s);' % (name, storage)
+
+
+def create_indexes(params, models=(), composite=False,
+                   vector_fields=VECTOR_FIELDS, db_alias=DEFAULT_DB_ALIAS,
+                   drop=False, concurrently=True):
+    """
+    Creates (or drops) composite and partial GIN indexes, without locking
+    writes unless ``concurrently`` is ``False``, which is required
+    in a transaction. Returns the executed SQL statements.
+    """
+    connection = connections[db_alias]
+    statements = []
+    for vector_field in vector_fields:
+        if composite:
+            statements.append(get_composite_index_sql(
+                connection, vector_field, params, concurrently))
+        for model in models:
+            statements.append(get_partial_index_sql(
+                connection, model, vector_field, params, concurrently))
+    statements = [drop_sql if drop else create_sql
+                  for create_sql, drop_sql in statements
+                  if drop or create_sql is not None]
+    if composite and not drop:
+        statements.insert(0, 'CREATE EXTENSION IF NOT EXISTS btree_gin;')
+    if not drop:
+        statements.extend(filter(None, (
+            get_storage_update_sql(connection, vector_field, params)
+            for vector_field in vector_fields)))
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+    return statements
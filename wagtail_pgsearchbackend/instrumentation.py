@@ -0,0 +1,98 @@
+from __future__ import absolute_import, unicode_literals
+
+import json
+import random
+from contextlib import contextmanager
+from timeit import default_timer
+
+from django.db import connections
+from django.db.models.query import QuerySet, RawQuerySet
+from django.utils.module_loading import import_string
+from django.utils.six import string_types
+
+# Operations whose execution plan can be sampled when they are slow.
+SEARCH_OPERATIONS = ('search', 'count')
+
+
+def get_results_sql(results):
+    """
+    Returns the SQL and parameters of search results before they are
+    fetched, or ``(None, None)`` if they are already fetched.
+    """
+    if isinstance(results, RawQuerySet):
+        return results.raw_query, tuple(results.params)
+    if isinstance(results, QuerySet):
+        return results.query.get_compiler(results.db).as_sql()
+    return None, None
+
+
+def explain(db_alias, sql, params, analyze=False):
+    """
+    Returns the estimated plan of a query, or its actual plan using
+    ``EXPLAIN (ANALYZE, BUFFERS)`` if ``analyze`` is ``True``,
+    in which case the query is executed again.
+    """
+    options = 'ANALYZE, BUFFERS, FORMAT JSON' if analyze else 'FORMAT JSON'
+    with connections[db_alias].cursor() as cursor:
+        cursor.execute('EXPLAIN (%s) %s' % (options, sql), params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, string_types):
+        plan = json.loads(plan)
+    return plan
+
+
+class Instrumentation(object):
+    """
+    Measures searches and index writes, and reports them to ``callback``
+    as dictionaries containing at least the ``operation``, ``model``,
+    ``db_alias`` and ``duration`` (in seconds) keys.
+
+    Searches and counts taking at least ``slow_search_threshold`` seconds
+    are explained, and their plan is reported with the ``plan`` key.
+    A fraction ``analyze_rate`` of them is explained with ``ANALYZE``,
+    which runs them again.
+    """
+
+    def __init__(self, callback, slow_search_threshold=None, analyze_rate=0):
+        if isinstance(callback, string_types):
+            callback = import_string(callback)
+        self.callback = callback
+        self.slow_search_threshold = slow_search_threshold
+        self.analyze_rate = analyze_rate
+
+    def is_slow(self, event):
+        return (event['operation'] in SEARCH_OPERATIONS and
+                self.slow_search_threshold is not None and
+                event['duration'] >= self.slow_search_threshold and
+                event.get('sql') is not None)
+
+    @contextmanager
+    def measure(self, operation, model, db_alias, **info):
+        """
+        Measures the duration of the block, which can add information
+        like ``rows``, ``sql`` and ``params`` to the yielded event.
+        """
+        event = dict(info, operation=operation, model=model._meta.label,
+                     db_alias=db_alias)
+        start = default_timer()
+        yield event
+        event['duration'] = default_timer() - start
+        if self.is_slow(event):
+            event['plan'] = explain(db_alias, event['sql'],
+                                    event.get('params', ()),
+                                    random.random() < self.analyze_rate)
+        self.callback(event)
+
+
+@contextmanager
+def measure(instrumentation, operation, model, db_alias, **info):
+    """
+    Same as ``Instrumentation.measure``, yielding ``None`` instead
+    of an event when ``instrumentation`` is ``None``.
+    """
+    if instrumentation is None:
+        yield
+        return
+    with instrumentation.measure(operation, model, db_alias,
+                                 **info) as event:
+        yield event
@@ -0,0 +1,58 @@
+from __future__ import absolute_import, unicode_literals
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from wagtail.wagtailsearch.backends import get_search_backend
+
+from ...backend import PostgresSearchBackend
+from ...indexes import VECTOR_FIELDS, create_indexes
+
+
+class Command(BaseCommand):
+    help = ('Creates GIN indexes restricted to content types, so that '
+            'searches on these content types only read their entries.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*', metavar='app_label.ModelName',
+            help='Models getting a partial index of their entries')
+        parser.add_argument(
+            '--composite', action='store_true', dest='composite',
+            default=False,
+            help='Create GIN indexes on content types and search vectors, '
+                 'using the btree_gin extension')
+        parser.add_argument(
+            '--field', action='append', dest='vector_fields',
+            choices=VECTOR_FIELDS,
+            help='Only index this search vector, can be repeated')
+        parser.add_argument(
+            '--drop', action='store_true', dest='drop', default=False,
+            help='Drop the indexes instead of creating them')
+        parser.add_argument(
+            '--backend', action='store', dest='backend_name',
+            default='default', help='Specify a backend to read settings from')
+        parser.add_argument(
+            '--database', action='store', dest='db_alias',
+            default=DEFAULT_DB_ALIAS, help='Specify a database')
+
+    def handle(self, **options):
+        backend = get_search_backend(options['backend_name'])
+        if not isinstance(backend, PostgresSearchBackend):
+            raise CommandError("Backend '%s' is not a PostgreSQL search "
+                               "backend." % options['backend_name'])
+        connection = connections[options['db_alias']]
+        if ('GIN_PENDING_LIST_LIMIT' in backend.params and
+                connection.pg_version < 90500):
+            raise CommandError('GIN_PENDING_LIST_LIMIT requires '
+                               'PostgreSQL >= 9.5.')
+        try:
+            models = [apps.get_model(label) for label in options['models']]
+        except (LookupError, ValueError) as e:
+            raise CommandError(e)
+        statements = create_indexes(
+            backend.params, models=models, composite=options['composite'],
+            vector_fields=options['vector_fields'] or VECTOR_FIELDS,
+            db_alias=options['db_alias'], drop=options['drop'])
+        for statement in statements:
+            self.stdout.write(statement)
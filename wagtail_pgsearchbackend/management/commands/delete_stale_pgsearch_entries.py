@@ -0,0 +1,35 @@
+from __future__ import absolute_import, unicode_literals
+
+from django.core.management.base import BaseCommand, CommandError
+from wagtail.wagtailsearch.backends import get_search_backend
+from wagtail.wagtailsearch.index import get_indexed_models
+
+from ...backend import PostgresSearchBackend
+
+
+class Command(BaseCommand):
+    help = ('Deletes the index entries of objects that no longer exist, '
+            'without rebuilding the index.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backend', action='store', dest='backend_name',
+            default='default', help='Specify a backend to clean')
+        parser.add_argument(
+            '--database', action='store', dest='db_alias', default=None,
+            help='Specify a database to clean the index of')
+
+    def handle(self, **options):
+        backend = get_search_backend(options['backend_name'])
+        if not isinstance(backend, PostgresSearchBackend):
+            raise CommandError("Backend '%s' is not a PostgreSQL search "
+                               "backend." % options['backend_name'])
+        total = 0
+        for model in get_indexed_models():
+            index = backend.get_index_for_model(model, options['db_alias'])
+            deleted = index.delete_stale_entries()
+            if deleted:
+                self.stdout.write('%s: deleted %d stale entries'
+                                  % (model._meta.label, deleted))
+            total += deleted
+        self.stdout.write('Deleted %d stale entries in total' % total)
@@ -0,0 +1,51 @@
+from __future__ import absolute_import, unicode_literals
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from wagtail.wagtailsearch.backends import get_search_backend
+
+from ...backend import PostgresSearchBackend
+from ...update_queue import DEFAULT_QUEUE_BATCH_SIZE, process_queue
+
+
+class Command(BaseCommand):
+    help = 'Processes the index updates queued when QUEUED is enabled.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backend', action='store', dest='backend_name',
+            default='default', help='Specify a backend to update')
+        parser.add_argument(
+            '--database', action='store', dest='db_alias',
+            default=DEFAULT_DB_ALIAS,
+            help='Specify a database to process the queue of')
+        parser.add_argument(
+            '--batch-size', action='store', dest='batch_size', type=int,
+            default=DEFAULT_QUEUE_BATCH_SIZE,
+            help='Number of queued updates processed at once')
+        parser.add_argument(
+            '--loop', action='store_true', dest='loop', default=False,
+            help='Keep waiting for updates once the queue is empty')
+        parser.add_argument(
+            '--interval', action='store', type=float, default=1.0,
+            help='Seconds to wait before checking an empty queue again')
+
+    def handle(self, **options):
+        backend = get_search_backend(options['backend_name'])
+        if not isinstance(backend, PostgresSearchBackend):
+            raise CommandError("Backend '%s' is not a PostgreSQL search "
+                               "backend." % options['backend_name'])
+        total = 0
+        while True:
+            count = process_queue(backend, options['db_alias'],
+                                  options['batch_size'])
+            total += count
+            if count:
+                self.stdout.write('Processed %d updates' % count)
+            if count < options['batch_size']:
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        self.stdout.write('Processed %d updates in total' % total)
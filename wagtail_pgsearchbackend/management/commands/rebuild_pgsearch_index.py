@@ -0,0 +1,41 @@
+from __future__ import absolute_import, unicode_literals
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...backend import PostgresSearchBackend
+from ...parallel import ParallelRebuilder
+
+
+class Command(BaseCommand):
+    help = ('Rebuilds a PostgreSQL search index '
+            'using several processes in parallel.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backend', action='store', dest='backend_name',
+            default='default', help='Specify a backend to rebuild')
+        parser.add_argument(
+            '--database', action='store', dest='db_alias', default=None,
+            help='Specify a database to rebuild the index of')
+        parser.add_argument(
+            '--workers', action='store', type=int, default=None,
+            help='Number of processes, the number of CPUs by default')
+        parser.add_argument(
+            '--partitions', action='store', type=int, default=None,
+            help='Number of primary key ranges each model is split into, '
+                 'four times the number of processes by default')
+
+    def progress(self, model_label, indexed, total):
+        self.stdout.write('%s: %d/%d objects' % (model_label, indexed, total))
+
+    def handle(self, **options):
+        rebuilder = ParallelRebuilder(
+            options['backend_name'], db_alias=options['db_alias'],
+            workers=options['workers'], partitions=options['partitions'])
+        if not isinstance(rebuilder.backend, PostgresSearchBackend):
+            raise CommandError("Backend '%s' is not a PostgreSQL search "
+                               "backend." % options['backend_name'])
+        self.stdout.write('Rebuilding backend %s using %d processes'
+                          % (options['backend_name'], rebuilder.workers))
+        count = rebuilder.run(progress=self.progress)
+        self.stdout.write('Indexed %d objects' % count)
@@ -0,0 +1,20 @@
+from __future__ import absolute_import, unicode_literals
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from ...suggestions import refresh_lexicon
+
+
+class Command(BaseCommand):
+    help = ('Refreshes the lexicon of spelling suggestions '
+            'from the lexemes of the index.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', action='store', dest='db_alias',
+            default=DEFAULT_DB_ALIAS, help='Specify a database')
+
+    def handle(self, **options):
+        count = refresh_lexicon(options['db_alias'])
+        self.stdout.write('The lexicon contains %d lexemes' % count)
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+import django.contrib.postgres.search
+
+from ..models import IndexEntry
+
+
+table = IndexEntry._meta.db_table
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtail_pgsearchbackend', '0002_add_gin_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='indexentry',
+            name='autocomplete',
+            field=django.contrib.postgres.search.SearchVectorField(default=''),
+            preserve_default=False,
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX {0}_autocomplete ON {0} '
+            'USING GIN(autocomplete);'.format(table),
+            'DROP INDEX IF EXISTS {}_autocomplete;'.format(table),
+        ),
+    ]
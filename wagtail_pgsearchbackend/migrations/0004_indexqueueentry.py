@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import django.db.models.deletion
+import django.utils.timezone
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('wagtail_pgsearchbackend', '0003_indexentry_autocomplete'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexQueueEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.TextField()),
+                ('operation', models.CharField(choices=[('add', 'add'), ('delete', 'delete')], max_length=6)),
+                ('queued_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.ContentType')),
+            ],
+            options={
+                'verbose_name_plural': 'index queue entries',
+                'verbose_name': 'index queue entry',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='indexqueueentry',
+            unique_together=set([('content_type', 'object_id')]),
+        ),
+    ]
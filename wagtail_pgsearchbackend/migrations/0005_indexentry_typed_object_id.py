@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtail_pgsearchbackend', '0004_indexqueueentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='indexentry',
+            name='int_object_id',
+            field=models.BigIntegerField(db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='indexentry',
+            name='uuid_object_id',
+            field=models.UUIDField(db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtail_pgsearchbackend', '0005_indexentry_typed_object_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Lexeme',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('word', models.TextField(unique=True)),
+                ('ndoc', models.IntegerField()),
+            ],
+            options={
+                'verbose_name_plural': 'lexemes',
+                'verbose_name': 'lexeme',
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtail_pgsearchbackend', '0006_lexeme'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='indexentry',
+            name='boost',
+            field=models.FloatField(default=1),
+        ),
+    ]
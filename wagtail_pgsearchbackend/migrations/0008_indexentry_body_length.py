@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtail_pgsearchbackend', '0007_indexentry_boost'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='indexentry',
+            name='body_length',
+            field=models.IntegerField(null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtail_pgsearchbackend', '0008_indexentry_body_length'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='indexentry',
+            name='body_digest',
+            field=models.CharField(max_length=32, null=True),
+        ),
+    ]
@@ -2,16 +2,55 @@ from __future__ import absolute_import, unicode_literals
 
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
-from django.contrib.postgres.search import SearchRank, SearchVectorField
+from django.contrib.postgres.search import SearchVectorField
 from django.db.models import (
-    CASCADE, AutoField, BigAutoField, BigIntegerField, F, ForeignKey,
-    IntegerField, Model, QuerySet, TextField)
-from django.db.models.functions import Cast
+    CASCADE, AutoField, BigAutoField, BigIntegerField, CharField,
+    DateTimeField, F, FloatField, ForeignKey, IntegerField, Model, QuerySet,
+    TextField, UUIDField, Value)
+from django.db.models.functions import Cast, Greatest
+from django.utils import timezone
 from django.utils.encoding import force_text, python_2_unicode_compatible
 from django.utils.translation import ugettext_lazy as _
 
+from .query import (
+    LENGTH_NORMALIZATION, LOG_LENGTH_NORMALIZATION, RELATIVE_NORMALIZATION,
+    LengthNormalizedRank, NormalizedSearchRank)
 from .utils import WEIGHTS_VALUES, get_descendants_content_types_pks
 
+# Lowest rank before boosts are applied. Fields without boosts have a zero
+# weight, so entries only matching them would have a zero rank whatever
+# their boost.
+MIN_RANK = 1e-6
+
+# Columns storing typed copies of ``object_id``, with their SQL type.
+TYPED_OBJECT_ID_COLUMNS = {
+    'int_object_id': 'bigint',
+    'uuid_object_id': 'uuid',
+}
+
+
+def get_pk_field(model):
+    """
+    Returns the field storing primary key values of a model,
+    following primary keys that are relations, like parent links.
+    """
+    pk = model._meta.pk
+    while pk.remote_field is not None:
+        pk = pk.target_field
+    return pk
+
+
+def get_typed_object_id_column(model):
+    """
+    Returns the column that can store the primary keys of a model
+    without casting them, or ``None`` if there is no such column.
+    """
+    pk = get_pk_field(model)
+    if isinstance(pk, (AutoField, IntegerField)):
+        return 'int_object_id'
+    if isinstance(pk, UUIDField):
+        return 'uuid_object_id'
+
 
 class IndexQuerySet(QuerySet):
     def for_models(self, *models):
@@ -26,25 +65,59 @@ class IndexQuerySet(QuerySet):
         return (self.using(db_alias).for_models(obj._meta.model)
                 .filter(object_id=force_text(obj.pk)))
 
-    def add_rank(self, search_query):
-        return self.annotate(
-            rank=SearchRank(
-                F('body_search'), search_query,
-                weights='{' + ','.join(map(str, WEIGHTS_VALUES)) + '}'))
-
-    def rank(self, search_query):
-        return self.add_rank(search_query).order_by('-rank')
-
-    def annotate_typed_pk(self):
-        cast_field = self.model._meta.pk
+    def add_rank(self, search_query, vector_field='body_search',
+                 function='ts_rank', normalization=0):
+        """
+        Annotates the rank of entries multiplied by their boost, computed
+        by ``function`` with the ``normalization`` bitmask of PostgreSQL
+        ranking functions and raised to at least ``MIN_RANK``.
+        Normalizations by the number of words of the body use
+        ``body_length`` when it is known.
+        """
+        weights = '{' + ','.join(map(str, WEIGHTS_VALUES)) + '}'
+        rank = NormalizedSearchRank(F(vector_field), search_query,
+                                    weights=weights, function=function,
+                                    normalization=normalization)
+        length_normalization = normalization & (LOG_LENGTH_NORMALIZATION |
+                                                LENGTH_NORMALIZATION)
+        if vector_field == 'body_search' and length_normalization:
+            rank = LengthNormalizedRank(
+                NormalizedSearchRank(
+                    F(vector_field), search_query, weights=weights,
+                    function=function,
+                    normalization=normalization & ~(length_normalization |
+                                                    RELATIVE_NORMALIZATION)),
+                rank, F('body_length'), normalization, function)
+        rank = Greatest(rank, Value(MIN_RANK, output_field=FloatField()))
+        return self.annotate(rank=rank * F('boost'))
+
+    def rank(self, search_query, vector_field='body_search',
+             function='ts_rank', normalization=0):
+        return self.add_rank(search_query, vector_field, function,
+                             normalization).order_by('-rank')
+
+    def annotate_typed_pk(self, model=None, typed_columns=False):
+        """
+        Annotates object ids converted to the type of the primary key
+        of ``model``, read from a typed column when ``typed_columns``
+        is ``True`` instead of cast for each row.
+        """
+        if model is None:
+            model = self.model
+        if typed_columns:
+            column = get_typed_object_id_column(model)
+            if column is not None:
+                return self.annotate(typed_pk=F(column))
+        cast_field = get_pk_field(model)
         if isinstance(cast_field, BigAutoField):
             cast_field = BigIntegerField()
         elif isinstance(cast_field, AutoField):
             cast_field = IntegerField()
         return self.annotate(typed_pk=Cast('object_id', cast_field))
 
-    def pks(self):
-        return self.annotate_typed_pk().values_list('typed_pk', flat=True)
+    def pks(self, model=None, typed_columns=False):
+        return (self.annotate_typed_pk(model, typed_columns)
+                .values_list('typed_pk', flat=True))
 
 
 @python_2_unicode_compatible
@@ -53,9 +126,22 @@ class IndexEntry(Model):
     # We do not use an IntegerField since primary keys are not always integers.
     object_id = TextField()
     content_object = GenericForeignKey()
+    # Typed copies of ``object_id`` for integer and UUID primary keys,
+    # so that joins with model tables do not need casts.
+    int_object_id = BigIntegerField(null=True, db_index=True)
+    uuid_object_id = UUIDField(null=True, db_index=True)
+    # Multiplies the rank of the object, see ``Index.prepare_boost``.
+    boost = FloatField(default=1)
+    # Number of words of the body, used to normalize ranks by document
+    # length. Only computed on PostgreSQL >= 9.6.
+    body_length = IntegerField(null=True)
+    # Digest of the indexed data, so that unchanged entries are not
+    # written again, see ``Index.prepare_digest``.
+    body_digest = CharField(max_length=32, null=True)
 
-    # TODO: Add per-object boosting.
     body_search = SearchVectorField()
+    # Only contains the beginning of fields with ``partial_match`` enabled.
+    autocomplete = SearchVectorField()
 
     objects = IndexQuerySet.as_manager()
 
@@ -71,3 +157,48 @@ class IndexEntry(Model):
     @property
     def model(self):
         return self.content_type.model
+
+
+@python_2_unicode_compatible
+class IndexQueueEntry(Model):
+    """
+    An index update waiting to be processed, see ``QUEUED``.
+    Only the last queued operation on an object is kept.
+    """
+    ADD = 'add'
+    DELETE = 'delete'
+    OPERATIONS = (
+        (ADD, _('add')),
+        (DELETE, _('delete')),
+    )
+
+    content_type = ForeignKey(ContentType, on_delete=CASCADE)
+    object_id = TextField()
+    operation = CharField(max_length=6, choices=OPERATIONS)
+    queued_at = DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        unique_together = ('content_type', 'object_id')
+        verbose_name = _('index queue entry')
+        verbose_name_plural = _('index queue entries')
+
+    def __str__(self):
+        return '%s %s: %s' % (self.operation, self.content_type.name,
+                              self.object_id)
+
+
+@python_2_unicode_compatible
+class Lexeme(Model):
+    """
+    A lexeme of the index with the number of entries containing it,
+    used for spelling suggestions. Refreshed by ``refresh_lexicon``.
+    """
+    word = TextField(unique=True)
+    ndoc = IntegerField()
+
+    class Meta:
+        verbose_name = _('lexeme')
+        verbose_name_plural = _('lexemes')
+
+    def __str__(self):
+        return self.word
@@ -0,0 +1,153 @@
+from __future__ import absolute_import, unicode_literals
+
+from multiprocessing import Pool, cpu_count
+
+import django
+from django.apps import apps
+from django.db import DEFAULT_DB_ALIAS, connections
+from wagtail.wagtailsearch.backends import get_search_backend
+from wagtail.wagtailsearch.index import get_indexed_models
+
+from .backend import (
+    PostgresSearchRebuilder, get_db_alias, get_pk_column, get_sql)
+
+# Number of pk ranges per worker, so that workers finishing early
+# can take over ranges instead of waiting for the others.
+PARTITIONS_PER_WORKER = 4
+
+
+def get_pk_boundaries(queryset, partitions):
+    """
+    Returns the primary keys splitting ``queryset``
+    into ``partitions`` ranges of about the same size.
+    """
+    count = queryset.count()
+    step = -(-count // partitions)  # Rounded up.
+    if partitions <= 1 or count <= step:
+        return count, []
+    pk_column = get_pk_column(queryset.model)
+    sql, params = get_sql(queryset.order_by().values('pk'))
+    with connections[get_db_alias(queryset)].cursor() as cursor:
+        cursor.execute("""
+            SELECT "%s"
+            FROM (
+                SELECT "%s", row_number() OVER (ORDER BY "%s") AS position
+                FROM (%s) AS obj
+            ) AS obj
+            WHERE mod(position, %%s) = 0
+            ORDER BY position;
+            """ % (pk_column, pk_column, pk_column, sql), params + [step])
+        return count, [pk for pk, in cursor.fetchall()]
+
+
+def get_pk_ranges(queryset, partitions):
+    count, boundaries = get_pk_boundaries(queryset, partitions)
+    lower_bounds = [None] + boundaries
+    upper_bounds = boundaries + [None]
+    return count, list(zip(lower_bounds, upper_bounds))
+
+
+def filter_pk_range(queryset, pk_range):
+    lower_bound, upper_bound = pk_range
+    if lower_bound is not None:
+        queryset = queryset.filter(pk__gt=lower_bound)
+    if upper_bound is not None:
+        queryset = queryset.filter(pk__lte=upper_bound)
+    return queryset
+
+
+def init_worker():
+    # Processes are not forked on all platforms,
+    # in which case Django has to be set up again.
+    django.setup()
+
+
+def index_pk_range(task):
+    """
+    Indexes the objects of a model within a primary key range,
+    returning the model label and the number of indexed objects.
+    """
+    backend_name, model_label, db_alias, pk_range = task
+    model = apps.get_model(model_label)
+    backend = get_search_backend(backend_name)
+    index = backend.get_index_for_model(model, db_alias)
+    objs = filter_pk_range(model.get_indexed_objects().using(db_alias),
+                           pk_range)
+    counter = []
+
+    def count(objs):
+        for obj in objs:
+            counter.append(None)
+            yield obj
+
+    # Each worker loads its own staging table, as it is only visible
+    # to the database connection that created it.
+    PostgresSearchRebuilder(index).start_bulk_load()
+    index.add_items(model, count(objs.iterator()))
+    index.finish_bulk_load()
+    return model_label, len(counter)
+
+
+class ParallelRebuilder(object):
+    """
+    Rebuilds the index of all indexed models using a pool of processes,
+    each process indexing the objects of a primary key range
+    with its own database connection.
+
+    Unlike ``PostgresSearchAtomicRebuilder``, the rebuild
+    is not atomic, since each process has its own transactions.
+    """
+
+    def __init__(self, backend_name='default', db_alias=None, workers=None,
+                 partitions=None, models=None):
+        self.backend_name = backend_name
+        self.backend = get_search_backend(backend_name)
+        self.db_alias = db_alias or DEFAULT_DB_ALIAS
+        self.workers = workers or cpu_count()
+        self.partitions = partitions or self.workers * PARTITIONS_PER_WORKER
+        self.models = get_indexed_models() if models is None else models
+
+    def get_tasks(self):
+        tasks = []
+        counts = {}
+        for model in self.models:
+            index = self.backend.get_index_for_model(model, self.db_alias)
+            index.delete_stale_entries()
+            queryset = model.get_indexed_objects().using(index.db_alias)
+            count, pk_ranges = get_pk_ranges(queryset, self.partitions)
+            counts[model._meta.label] = count
+            tasks.extend((self.backend_name, model._meta.label,
+                          index.db_alias, pk_range) for pk_range in pk_ranges)
+        return tasks, counts
+
+    def run(self, progress=None):
+        """
+        Rebuilds the index and returns the number of indexed objects.
+        ``progress`` is called with the model label, the number of objects
+        of this model indexed so far and the total number of objects
+        of this model each time a primary key range is indexed.
+        """
+        tasks, counts = self.get_tasks()
+        indexed = dict.fromkeys(counts, 0)
+        if self.workers == 1:
+            results = (index_pk_range(task) for task in tasks)
+            pool = None
+        else:
+            # Forked processes must not share the database connections
+            # of this process, so they have to open their own.
+            for connection in connections.all():
+                connection.close()
+            pool = Pool(self.workers, initializer=init_worker)
+            results = pool.imap_unordered(index_pk_range, tasks)
+        try:
+            for model_label, count in results:
+                indexed[model_label] += count
+                if progress is not None:
+                    progress(model_label, indexed[model_label],
+                             counts[model_label])
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+        self.backend.invalidate_cached_results(self.db_alias)
+        return sum(indexed.values())
@@ -0,0 +1,175 @@
+from __future__ import absolute_import, unicode_literals
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Manager
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.fields.related import ForeignObjectRel, RelatedField
+from django.utils.encoding import force_text
+from django.utils.six import string_types
+from wagtail.wagtailsearch.index import RelatedFields, SearchField
+
+from .utils import get_weight, unidecode
+
+# Indexing plans by model, see ``get_indexing_plan``.
+INDEXING_PLANS = {}
+
+
+def prepare_value(value):
+    if isinstance(value, string_types):
+        return value
+    if isinstance(value, list):
+        return ', '.join(prepare_value(item) for item in value)
+    if isinstance(value, dict):
+        return ', '.join(prepare_value(item) for item in value.values())
+    return force_text(value)
+
+
+def get_model_field(model, field_name):
+    if model is None:
+        return
+    try:
+        return model._meta.get_field(field_name)
+    except FieldDoesNotExist:
+        return
+
+
+def is_relation(model_field):
+    return isinstance(model_field, (RelatedField, ForeignObjectRel))
+
+
+def compile_getter(model, field):
+    """
+    Returns a function getting the value of a ``SearchField``,
+    equivalent to ``field.get_value`` but without looking up
+    the model field for each object.
+    """
+    if model is None:
+        return field.get_value
+    model_field = get_model_field(model, field.field_name)
+    if model_field is None:
+        field_name = field.field_name
+
+        def get_value(obj):
+            value = getattr(obj, field_name, None)
+            if callable(value):
+                value = value()
+            return value
+        return get_value
+    if hasattr(model_field, 'get_searchable_content'):
+        return lambda obj: model_field.get_searchable_content(
+            model_field.value_from_object(obj))
+    return model_field.value_from_object
+
+
+def compile_search_field(model, field):
+    get_value = compile_getter(model, field)
+    weight = get_weight(field.boost)
+
+    def extract(obj):
+        yield unidecode(prepare_value(get_value(obj))), weight
+    return extract
+
+
+def compile_related_fields(model, field, partial_match):
+    field_name = field.field_name
+    model_field = get_model_field(model, field_name)
+    sub_model = model_field.related_model if is_relation(model_field) else None
+    extractors = compile_fields(sub_model, field.fields, partial_match)
+    if not extractors:
+        return
+
+    def extract(obj):
+        sub_obj = getattr(obj, field_name)
+        if sub_obj is None:
+            return
+        if callable(sub_obj):
+            sub_obj = sub_obj()
+        if isinstance(sub_obj, Manager):
+            sub_objs = sub_obj.all()
+        else:
+            sub_objs = [sub_obj]
+        for sub_obj in sub_objs:
+            for sub_extract in extractors:
+                for value in sub_extract(sub_obj):
+                    yield value
+    return extract
+
+
+def compile_fields(model, fields, partial_match=False):
+    """
+    Returns a list of functions yielding the ``(text, weight)`` pairs
+    of an object for each of the given search fields.
+    """
+    extractors = []
+    for field in fields:
+        if isinstance(field, SearchField):
+            if partial_match and not field.partial_match:
+                continue
+            extractors.append(compile_search_field(model, field))
+        elif isinstance(field, RelatedFields):
+            extract = compile_related_fields(model, field, partial_match)
+            if extract is not None:
+                extractors.append(extract)
+    return extractors
+
+
+def get_related_lookups(model, fields, prefix=''):
+    """
+    Returns the ``prefetch_related`` lookups of the relations
+    followed by the ``RelatedFields`` of a model.
+    """
+    lookups = []
+    for field in fields:
+        if not isinstance(field, RelatedFields):
+            continue
+        model_field = get_model_field(model, field.field_name)
+        if not is_relation(model_field):
+            continue
+        lookup = prefix + field.field_name
+        lookups.append(lookup)
+        lookups.extend(get_related_lookups(model_field.related_model,
+                                           field.fields, lookup + LOOKUP_SEP))
+    return lookups
+
+
+class IndexingPlan(object):
+    """
+    Everything needed to extract the indexed text of a model's objects,
+    computed once per model instead of for each object.
+    """
+
+    def __init__(self, model, search_fields):
+        self.model = model
+        self.search_fields = search_fields
+        self.body_extractors = compile_fields(model, search_fields)
+        self.autocomplete_extractors = compile_fields(model, search_fields,
+                                                      partial_match=True)
+        self.related_lookups = get_related_lookups(model, search_fields)
+
+    def extract_body(self, obj):
+        return [value for extract in self.body_extractors
+                for value in extract(obj)]
+
+    def extract_autocomplete(self, obj):
+        for extract in self.autocomplete_extractors:
+            for value in extract(obj):
+                yield value
+
+
+def get_indexing_plan(model):
+    """
+    Returns the indexing plan of a model, built the first time it is used.
+    """
+    plan = INDEXING_PLANS.get(model)
+    if plan is None:
+        plan = IndexingPlan(model, model.get_search_fields())
+        INDEXING_PLANS[model] = plan
+    return plan
+
+
+def clear_indexing_plans():
+    """
+    Forgets the indexing plans built so far, so that search fields
+    modified at runtime (especially in tests) are taken into account.
+    """
+    INDEXING_PLANS.clear()
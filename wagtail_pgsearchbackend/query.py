@@ -0,0 +1,148 @@
+from __future__ import absolute_import, unicode_literals
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import FloatField, Func, Value
+from django.utils.lru_cache import lru_cache
+
+from .utils import AND, OR, keyword_split, unidecode
+
+# Matches a quoted lexeme in the text representation of a tsquery.
+LEXEME_REGEX = "'(?:[^']|'')*'"
+
+RANK_FUNCTIONS = ('ts_rank', 'ts_rank_cd')
+
+# Normalization flags of PostgreSQL ranking functions that count
+# the words of each document, and the one applied last to their result.
+LOG_LENGTH_NORMALIZATION = 1
+LENGTH_NORMALIZATION = 2
+RELATIVE_NORMALIZATION = 32
+
+# Number of compiled search queries kept, see ``compile_search_query``.
+SEARCH_QUERIES_CACHE_SIZE = 1024
+
+
+class LexemeSearchQuery(SearchQuery):
+    """
+    A ``plainto_tsquery`` restricting each of its lexemes to the given
+    weights and optionally matching them as prefixes,
+    e.g. ``'hello':*AB & 'world':*AB``.
+
+    With ``phrase=True``, a ``phraseto_tsquery`` matching its words
+    next to each other instead, e.g. ``'hello':AB <-> 'world':AB``.
+    Requires PostgreSQL >= 9.6.
+    """
+
+    def __init__(self, value, output_field=None, **extra):
+        self.weights = extra.pop('weights', '')
+        self.prefix = extra.pop('prefix', False)
+        self.phrase = extra.pop('phrase', False)
+        super(LexemeSearchQuery, self).__init__(
+            value, output_field=output_field, **extra)
+
+    def get_lexeme_suffix(self):
+        if self.prefix or self.weights:
+            return ':' + ('*' if self.prefix else '') + self.weights
+        return ''
+
+    def as_sql(self, compiler, connection):
+        sql, params = super(LexemeSearchQuery, self).as_sql(compiler,
+                                                            connection)
+        if self.phrase:
+            # Both functions take the same arguments.
+            sql = sql.replace('plainto_tsquery(', 'phraseto_tsquery(', 1)
+        suffix = self.get_lexeme_suffix()
+        if not suffix:
+            return sql, params
+        return ("regexp_replace(%s::text, '%s', %%s, 'g')::tsquery"
+                % (sql, LEXEME_REGEX.replace("'", "''")),
+                params + ['\\&' + suffix])
+
+
+@lru_cache(maxsize=SEARCH_QUERIES_CACHE_SIZE)
+def compile_search_query(query_string, operator, config, weights='',
+                         prefix=False, phrases=False):
+    """
+    Returns the tsquery expression matching a query string. Expressions
+    are cached, as they are copied instead of modified when used.
+
+    Quoted terms match their words in the same order next to each other
+    if ``phrases`` is ``True``, otherwise anywhere in the document.
+    """
+    def get_query(text, phrase=False):
+        return LexemeSearchQuery(text, config=config, weights=weights,
+                                 prefix=prefix, phrase=phrase)
+
+    search_terms = keyword_split(unidecode(query_string))
+    if not search_terms:
+        return SearchQuery('')
+    # Only quoted terms can contain several words.
+    phrase_terms = [term for term in search_terms
+                    if phrases and len(term.split()) > 1]
+    if operator == 'or':
+        return OR(get_query(term, phrase=term in phrase_terms)
+                  for term in search_terms)
+    # ``plainto_tsquery`` matches all the words of its text,
+    # so a single one matches all the other terms.
+    words = [term for term in search_terms if term not in phrase_terms]
+    search_queries = [get_query(' '.join(words))] if words else []
+    search_queries.extend(get_query(term, phrase=True)
+                          for term in phrase_terms)
+    return AND(search_queries)
+
+
+class NormalizedSearchRank(SearchRank):
+    """
+    A ``SearchRank`` passing a normalization bitmask to the ranking function,
+    which can be ``ts_rank_cd`` using ``function='ts_rank_cd'``.
+    """
+
+    def __init__(self, vector, query, normalization=0, **extra):
+        super(NormalizedSearchRank, self).__init__(vector, query, **extra)
+        self.normalization = normalization
+        if normalization:
+            self.source_expressions.append(Value(normalization))
+
+
+class LengthNormalizedRank(Func):
+    """
+    Applies the normalizations by document length of PostgreSQL ranking
+    functions using a precomputed number of words, so that the words
+    of each vector do not have to be counted for every match.
+
+    ``rank`` must be computed without these normalizations by ``function``,
+    ``fallback_rank`` with all of them. The latter is used when ``length``
+    is null.
+    """
+
+    def __init__(self, rank, fallback_rank, length, normalization,
+                 function='ts_rank'):
+        super(LengthNormalizedRank, self).__init__(
+            rank, fallback_rank, length, output_field=FloatField())
+        self.normalization = normalization
+        self.function = function
+
+    def as_sql(self, compiler, connection):
+        rank_sql, params = compiler.compile(self.source_expressions[0])
+        fallback_sql, fallback_params = compiler.compile(
+            self.source_expressions[1])
+        length_sql, length_params = compiler.compile(
+            self.source_expressions[2])
+        params = length_params + fallback_params + params
+        # PostgreSQL only divides ranks of non-empty documents,
+        # whose ranks are zero anyway.
+        if self.normalization & LOG_LENGTH_NORMALIZATION:
+            # ``ts_rank`` divides by the base 2 logarithm,
+            # ``ts_rank_cd`` by the natural logarithm.
+            log_sql = 'ln(GREATEST(%s, 1) + 1)' % length_sql
+            if self.function == 'ts_rank':
+                log_sql = '(%s / ln(2))' % log_sql
+            rank_sql = '%s / %s' % (rank_sql, log_sql)
+            params += length_params
+        if self.normalization & LENGTH_NORMALIZATION:
+            rank_sql = '%s / GREATEST(%s, 1)' % (rank_sql, length_sql)
+            params += length_params
+        if self.normalization & RELATIVE_NORMALIZATION:
+            # Same as ``rank / (rank + 1)``, without computing the rank twice.
+            rank_sql = '1 - 1 / (%s + 1)' % rank_sql
+        return ('CASE WHEN %s IS NULL THEN %s ELSE %s END'
+                % (length_sql, fallback_sql, rank_sql), params)
@@ -0,0 +1,115 @@
+from __future__ import absolute_import, unicode_literals
+
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from .indexes import index_exists
+from .models import IndexEntry, Lexeme
+from .utils import unidecode
+
+WORD_REGEX = re.compile(r'\w+', re.UNICODE)
+
+
+def create_trigram_index(connection):
+    """
+    Creates the trigram index of the lexicon looking up similar words,
+    and the ``pg_trgm`` extension it requires unless it is installed.
+    Creating the extension requires superuser privileges
+    before PostgreSQL 13.
+    """
+    lexicon_table = Lexeme._meta.db_table
+    index_name = '%s_word_trgm' % lexicon_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm';")
+        if cursor.fetchone() is None:
+            cursor.execute('CREATE EXTENSION pg_trgm;')
+        if not index_exists(connection, index_name, lexicon_table):
+            cursor.execute('CREATE INDEX %s ON %s '
+                           'USING GIN(word gin_trgm_ops);'
+                           % (index_name, lexicon_table))
+
+
+def refresh_lexicon(db_alias=DEFAULT_DB_ALIAS):
+    """
+    Replaces the lexicon with the lexemes currently in the index,
+    and returns the number of lexemes.
+    """
+    connection = connections[db_alias]
+    lexicon_table = Lexeme._meta.db_table
+    stat_sql = "ts_stat('SELECT body_search FROM %s')" % (
+        IndexEntry._meta.db_table)
+    with transaction.atomic(using=db_alias), connection.cursor() as cursor:
+        create_trigram_index(connection)
+        if connection.pg_version >= 90500:  # PostgreSQL >= 9.5
+            # Only writes the lexemes that changed,
+            # instead of rewriting the whole lexicon.
+            # The temporary table is qualified by the ``pg_temp`` schema
+            # so that a permanent table with the same name is never dropped.
+            stat_table = 'pg_temp.%s_stat' % lexicon_table
+            cursor.execute("""
+                DROP TABLE IF EXISTS %s;
+                CREATE TEMPORARY TABLE %s ON COMMIT DROP AS
+                SELECT word, ndoc FROM %s;
+                DELETE FROM %s AS lexeme
+                WHERE NOT EXISTS (SELECT 1 FROM %s AS stat
+                                  WHERE stat.word = lexeme.word);
+                INSERT INTO %s (word, ndoc)
+                SELECT word, ndoc FROM %s
+                ON CONFLICT (word) DO UPDATE SET ndoc = EXCLUDED.ndoc
+                WHERE %s.ndoc <> EXCLUDED.ndoc;
+                """ % (stat_table, stat_table, stat_sql, lexicon_table,
+                       stat_table, lexicon_table, stat_table, lexicon_table))
+        else:
+            cursor.execute('DELETE FROM %s;' % lexicon_table)
+            cursor.execute("""
+                INSERT INTO %s (word, ndoc)
+                SELECT word, ndoc FROM %s;
+                """ % (lexicon_table, stat_sql))
+        cursor.execute('SELECT COUNT(*) FROM %s;' % lexicon_table)
+        return cursor.fetchone()[0]
+
+
+def get_suggestion(query_string, config=None, db_alias=DEFAULT_DB_ALIAS):
+    """
+    Returns ``query_string`` with its unknown words replaced with the most
+    similar lexemes of the lexicon, or ``None`` if all words are known
+    or no similar lexeme was found.
+    """
+    words = WORD_REGEX.findall(unidecode(query_string).lower())
+    if not words:
+        return
+    lexeme_sql = ('plainto_tsquery(term.word)' if config is None
+                  else "plainto_tsquery('%s', term.word)" % config)
+    # Words are compared to the lexicon once normalized, so that words
+    # differing from their lexeme (because of stemming, for example)
+    # are not considered misspelled.
+    # Unknown words are looked up by a correlated subquery instead of
+    # a lateral join, which requires PostgreSQL >= 9.3.
+    with connections[db_alias].cursor() as cursor:
+        cursor.execute("""
+            SELECT term.word, (
+                SELECT lexeme.word
+                FROM %s AS lexeme
+                WHERE term.lexeme <> '' AND lexeme.word %%%% term.word
+                ORDER BY similarity(lexeme.word, term.word) DESC,
+                         lexeme.ndoc DESC
+                LIMIT 1
+            )
+            FROM (
+                SELECT DISTINCT word,
+                       trim(both '''' from %s::text) AS lexeme
+                FROM unnest(%%s::text[]) AS term(word)
+            ) AS term
+            WHERE NOT EXISTS (SELECT 1 FROM %s AS known
+                              WHERE known.word = term.lexeme);
+            """ % (Lexeme._meta.db_table, lexeme_sql, Lexeme._meta.db_table),
+            [words])
+        suggestions = {word: suggestion
+                       for word, suggestion in cursor.fetchall()
+                       if suggestion is not None}
+    suggested_words = [suggestions.get(word, word) for word in words]
+    if suggested_words == words:
+        return
+    return ' '.join(suggested_words)
@@ -0,0 +1,122 @@
+from __future__ import absolute_import, unicode_literals
+
+from collections import OrderedDict
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+from django.utils.encoding import force_text
+
+from .models import IndexEntry, IndexQueueEntry
+from .utils import get_content_types_pks, get_db_alias_and_pk
+
+DEFAULT_QUEUE_BATCH_SIZE = 1000
+
+
+def enqueue(model, objs, operation, db_alias=DEFAULT_DB_ALIAS):
+    """
+    Queues an operation on objects of a model, given as instances or as
+    primary keys of objects of ``db_alias``. Operations previously
+    queued on the same objects are replaced, so that repeated updates
+    of an object are only processed once.
+    """
+    objs_by_db = OrderedDict()
+    for obj in objs:
+        obj_db_alias, pk = get_db_alias_and_pk(obj, db_alias)
+        # Duplicates are removed, as PostgreSQL cannot update
+        # the same row twice in a single upsert.
+        objs_by_db.setdefault(obj_db_alias, OrderedDict())[
+            force_text(pk)] = None
+    for db_alias, object_ids in objs_by_db.items():
+        content_type_pk = get_content_types_pks((model,), db_alias)[0]
+        connection = connections[db_alias]
+        object_ids = list(object_ids)
+        if connection.pg_version >= 90500:  # PostgreSQL >= 9.5
+            enqueue_upsert(connection, content_type_pk, object_ids,
+                           operation)
+        else:
+            for object_id in object_ids:
+                IndexQueueEntry._default_manager.using(
+                    db_alias).update_or_create(
+                    content_type_id=content_type_pk, object_id=object_id,
+                    defaults={'operation': operation,
+                              'queued_at': timezone.now()})
+
+
+def enqueue_upsert(connection, content_type_pk, object_ids, operation):
+    table = IndexQueueEntry._meta.db_table
+    for start in range(0, len(object_ids), DEFAULT_QUEUE_BATCH_SIZE):
+        chunk = object_ids[start:start + DEFAULT_QUEUE_BATCH_SIZE]
+        values_sql = ', '.join(['(%s, %s, %s, now())'] * len(chunk))
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO %s (content_type_id, object_id, operation,
+                                queued_at)
+                VALUES %s
+                ON CONFLICT (content_type_id, object_id)
+                DO UPDATE SET operation = EXCLUDED.operation,
+                              queued_at = EXCLUDED.queued_at;
+                """ % (table, values_sql),
+                [v for object_id in chunk
+                 for v in (content_type_pk, object_id, operation)])
+
+
+def pop_queue_entries(connection, batch_size):
+    """
+    Removes the oldest entries of the queue and returns them
+    as ``(content_type_id, object_id, operation)`` tuples.
+
+    Entries locked by another worker are skipped on PostgreSQL >= 9.5,
+    so that several workers can process the queue at the same time.
+    """
+    skip_locked = (' SKIP LOCKED' if connection.pg_version >= 90500
+                   else '')
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            DELETE FROM %s
+            WHERE id IN (
+                SELECT id FROM %s
+                ORDER BY queued_at
+                LIMIT %%s
+                FOR UPDATE%s
+            )
+            RETURNING content_type_id, object_id, operation;
+            """ % (IndexQueueEntry._meta.db_table,
+                   IndexQueueEntry._meta.db_table, skip_locked),
+            [batch_size])
+        return cursor.fetchall()
+
+
+def process_queue(backend, db_alias=DEFAULT_DB_ALIAS,
+                  batch_size=DEFAULT_QUEUE_BATCH_SIZE):
+    """
+    Processes a batch of queued operations and returns their number.
+
+    Entries are only removed from the queue if the whole batch
+    is processed successfully.
+    """
+    connection = connections[db_alias]
+    with transaction.atomic(using=db_alias):
+        entries = pop_queue_entries(connection, batch_size)
+        object_ids = OrderedDict()
+        for content_type_pk, object_id, operation in entries:
+            object_ids.setdefault((content_type_pk, operation),
+                                  []).append(object_id)
+        for (content_type_pk, operation), ids in object_ids.items():
+            model = ContentType.objects.db_manager(db_alias).get_for_id(
+                content_type_pk).model_class()
+            if model is None:
+                # The model no longer exists.
+                continue
+            if operation == IndexQueueEntry.ADD:
+                objs = list(model.get_indexed_objects().using(db_alias)
+                            .filter(pk__in=ids))
+                backend.get_index_for_model(model, db_alias).add_items(
+                    model, objs)
+                # Objects that are no longer indexed are removed.
+                ids = set(ids).difference(force_text(obj.pk) for obj in objs)
+            if ids:
+                (IndexEntry._default_manager.using(db_alias)
+                 .for_models(model).filter(object_id__in=ids).delete())
+            backend.invalidate_cached_results(db_alias, (model,))
+    return len(entries)
@@ -5,8 +5,8 @@ import re
 from functools import partial, reduce
 
 from django.apps import apps
-from django.db import connections
-from django.db.models import Q
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Model, Q
 from django.utils.lru_cache import lru_cache
 from django.utils.six.moves import zip_longest
 from wagtail.wagtailsearch.index import Indexed, RelatedFields, SearchField
@@ -24,6 +24,16 @@ def get_postgresql_connections():
             if connection.vendor == 'postgresql']
 
 
+def get_db_alias_and_pk(obj_or_pk, db_alias=DEFAULT_DB_ALIAS):
+    """
+    Returns the database alias and the primary key of an object,
+    or of an object of ``db_alias`` given its primary key.
+    """
+    if isinstance(obj_or_pk, Model):
+        return obj_or_pk._state.db or DEFAULT_DB_ALIAS, obj_or_pk.pk
+    return db_alias, obj_or_pk
+
+
 # Reduce any iterable to a single value using a logical OR e.g. (a | b | ...)
 OR = partial(reduce, operator.or_)
 # Reduce any iterable to a single value using a logical AND e.g. (a & b & ...)
@@ -51,6 +61,21 @@ def keyword_split(keywords):
     return [match[0] or match[1] or match[2] for match in matches]
 
 
+COPY_ESCAPES = {'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'}
+
+
+def copy_escape(value):
+    """
+    Escapes a value for the text format of PostgreSQL ``COPY``.
+
+    >>> print(copy_escape('Tab\\there,\\nnew line and a \\\\ backslash'))
+    Tab\\there,\\nnew line and a \\\\ backslash
+
+    """
+    return re.sub(r'[\\\t\n\r]', lambda match: COPY_ESCAPES[match.group(0)],
+                  value)
+
+
 def get_descendant_models(model):
     """
     Returns all descendants of a model, including the model itself.